@@ -2,9 +2,6 @@ import json
 import argparse
 
 
-tests_with_large_output = ["BiasScan"]
-
-
 parser = argparse.ArgumentParser()
 parser.add_argument("files", type=str, nargs="*", help="Json files to add comments to")
 parser.add_argument("-c", "--comment", type=str, default=None, help="Comment")
@@ -47,8 +44,6 @@ for fn in args.files:
         data["comments"] = comment
 
         file.seek(0)  # rewind
-        if data["test_name"] in tests_with_large_output:
-            json.dump(data, file)
-        else:
-            json.dump(data, file, indent=4)
+        # Large arrays are stored in binary sidecar files (see radiant_test.arrays), the references are kept
+        json.dump(data, file, indent=4)
         file.truncate()
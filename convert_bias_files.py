@@ -1,7 +1,11 @@
 import json
 import argparse
+import pathlib
 import numpy as np
 
+from radiant_test import load_result
+from radiant_test.arrays import store_large_arrays
+
 
 parser = argparse.ArgumentParser()
 parser.add_argument("files", type=str, nargs="*", help="Json files to add comments to")
@@ -11,7 +15,8 @@ args = parser.parse_args()
 
 for fn in args.files:
     with open(fn, "r+") as file:
-        data = json.load(file)
+        # Arrays stored in binary sidecar files are read into memory, they are stored again below
+        data = load_result(fn, as_lists=True)
 
         if "dut_uid" not in data:
             raise ValueError(f"\"dut_uid not in file. Is that a correct json file: {fn}")
@@ -35,6 +40,9 @@ for fn in args.files:
 
             data["run"]["measurements"][ch]["measured_value"]["line_fit_para"] = [np.around(a, 3).tolist(), np.around(b).tolist()]
 
+            data["run"]["measurements"][ch]["measured_value"] = store_large_arrays(
+                data["run"]["measurements"][ch]["measured_value"], pathlib.Path(fn).with_suffix(".arrays"), ch)
+
         file.seek(0)  # rewind
         json.dump(data, file)
         file.truncate()
@@ -2,6 +2,8 @@ import serial
 import logging
 from serial.tools import list_ports
 
+from .timing import timed
+
 
 class ArduinoNano():
     def __init__(self):
@@ -18,7 +20,7 @@ class ArduinoNano():
         return serial.Serial(port, baudrate, timeout=1)
 
     def close_serial_port(self):
-        if self.dev.is_open:
+        if hasattr(self, "dev") and self.dev.is_open:
             self.dev.close()
 
     def check_ports(self):
@@ -37,13 +39,14 @@ class ArduinoNano():
         print(f'Tried {line_counter} times to reroute signal; result: {line}')
         return line
 
+    @timed
     def route_signal_to_channel(self, channel):
         try:
             line = self.routing(channel)
         except serial.SerialException as e:
             print(f"Caught SerialException: {e}, reconnect serial port")
             self.close_serial_port()
-            self.open_serial_port()
+            self.dev = self.open_serial_port()
             line = self.routing(channel)
 
         return line
@@ -1,12 +1,15 @@
+import functools
 import logging
 import numpy as np
 import vxi11
 import json
 import sys
 from .AbstractSignalGenerator import AbstractSignalGenerator
+from .timing import timed
 import time
 
 def validate_channel(func):
+    @functools.wraps(func)
     def inner(self, *args, **kwargs):
         allowed_channels = [1, 2]
 
@@ -51,6 +54,9 @@ class Keysight81160A(AbstractSignalGenerator):
     def query(self,cmd):
         return self.instrument.ask(cmd)
 
+    def close(self):
+        self.instrument.close()
+
     @validate_channel
     def output_off(self, channel):
         self.instrument.write(f"OUTP{channel} OFF")
@@ -117,6 +123,7 @@ class Keysight81160A(AbstractSignalGenerator):
         else:
             raise ValueError(f"Unsupported trigger source: {source}.")
 
+    @timed
     @validate_channel
     def set_waveform(self, channel, waveform_dic):
         with open(waveform_dic, "r") as f:
@@ -141,6 +148,7 @@ class Keysight81160A(AbstractSignalGenerator):
         #self.instrument.write("TRIG")
         self.instrument.write("*TRG")
 
+    @timed
     def send_n_software_triggers(self, n_trigger, trigger_rate):
         self.instrument.write(f"ARM:SOUR MAN")
         delay_between_triggers = 1 / trigger_rate
@@ -158,11 +166,13 @@ class Keysight81160A(AbstractSignalGenerator):
     def recall_state(self, state=2):
         self.instrument.write(f"*RCL {state}")
 
+    @timed
     def setup_front_end_response_test(self, waveform, channel):
         self.set_waveform(channel, waveform)
         self.set_amplitude_mVpp(channel, 600)
         self.output_on(channel)
 
+    @timed
     def set_arb_waveform_amplitude_couple(self, waveform, ch_signal, ch_clock, amp_sig, amp_clock):
         for ch in [ch_signal, ch_clock]:
             self.output_off(ch)
@@ -176,6 +186,7 @@ class Keysight81160A(AbstractSignalGenerator):
         for ch in [ch_signal, ch_clock]:
             self.output_on(ch)
 
+    @timed
     def setup_sine_waves(self, frequency, amplitude):
         for sig_gen_cha in [1,2]:
             # make sure both outouts are off
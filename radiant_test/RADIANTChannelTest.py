@@ -1,5 +1,8 @@
+import concurrent.futures
+
 from .RADIANTTest import RADIANTTest
 from .radiant_helper import RADIANT_NUM_CHANNELS, RADIANT_NUM_QUADS, quad_for_channel
+from .timing import current_span, span
 
 
 class RADIANTChannelTest(RADIANTTest):
@@ -18,6 +21,11 @@ class RADIANTChannelTest(RADIANTTest):
     def finalize(self, result_dir="results"):
         super(RADIANTChannelTest, self).finalize(result_dir)
 
+    def enable_profiling(self):
+        super(RADIANTChannelTest, self).enable_profiling()
+        # cProfile only profiles the calling thread, analyse the quads in the same thread
+        self.update_conf({"args": {"pipeline_quads": False}})
+
     def get_quads(self):
         channel_ids = self.conf["args"]["channels"]
         already_had = []
@@ -26,3 +34,37 @@ class RADIANTChannelTest(RADIANTTest):
             if quad not in already_had:
                 already_had.append(quad)
                 yield quad
+
+    def run_quads(self, record_quad, analyze_quad, calselect=True):
+        """
+        Loop over all quads with channels to test: (optionally) connect the quad to the calibration
+        signal, record data with `record_quad(quad)` and analyse it with `analyze_quad(quad, data)`.
+
+        Unless `["args"]["pipeline_quads"]` is set to false, the analysis of a quad runs in a
+        background thread while the next quad is recorded.
+        """
+        pipeline = self.conf["args"].get("pipeline_quads", True)
+        # The analysis runs in another thread, its timing spans are added to the span of the caller
+        parent = current_span()
+
+        def analyze(quad, data):
+            with span(f"analyze_quad_{quad}", parent=parent):
+                analyze_quad(quad, data)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name) as executor:
+            analyses = []
+            for quad in self.get_quads():
+                with span(f"record_quad_{quad}"):
+                    if calselect:
+                        self.device.radiant_calselect(quad=quad)
+
+                    data = record_quad(quad)
+
+                if pipeline:
+                    analyses.append(executor.submit(analyze, quad, data))
+                else:
+                    analyze(quad, data)
+
+            # Propagate exceptions from the analysis
+            for analysis in analyses:
+                analysis.result()
@@ -4,6 +4,8 @@ from .Test import Test
 
 
 class RADIANTTest(Test):
+    resources = ["station"]
+
     def __init__(self, device=None, **kwargs):
         super(RADIANTTest, self).__init__(device, **kwargs)
 
@@ -1,8 +1,9 @@
 from .RADIANTChannelTest import RADIANTChannelTest
-from .Keysight81160A import Keysight81160A
-from .ArduinoNano import ArduinoNano
+from .instruments import get_arduino, get_awg
+from .radiant_helper import create_run, is_simulated
+from .timing import span, timed
 
-import stationrc.remote_control
+import stationrc.common
 
 import serial
 import logging
@@ -13,14 +14,19 @@ from radiant_test.util import confirm_or_abort
 
 
 class SigGenTest(RADIANTChannelTest):
+    resources = ["station", "awg", "arduino"]
+
     def __init__(self, device=None, **kwargs):
         super(SigGenTest, self).__init__(device, **kwargs)
-        self.awg = Keysight81160A(
-            self.site_conf['signal_gen_ip_address'])
-        try:
-            self.arduino = ArduinoNano()
-        except ImportError:
-            logging.info("Arduino not connected")
+
+    # The instruments are shared by all tests and only connected when they are used for the first time
+    @property
+    def awg(self):
+        return get_awg(self.site_conf['signal_gen_ip_address'])
+
+    @property
+    def arduino(self):
+        return get_arduino()
 
     def initialize(self):
         super(SigGenTest, self).initialize()
@@ -43,6 +49,17 @@ class SigGenTest(RADIANTChannelTest):
     #         n += 1
 
 
+    @timed
+    def route_signal(self, radiant_ch):
+        """
+        Let the Arduino route the signal of the bridge to `radiant_ch` (to the alternative clock
+        channel if `radiant_ch` is the clock channel, see `get_channel_settings`)
+        """
+        if radiant_ch == self.conf['args']['radiant_clock_channel']:
+            radiant_ch = self.conf['args']['radiant_clock_channel_alternative']
+        return self.arduino.route_signal_to_channel(radiant_ch)
+
+    @timed
     def get_channel_settings(self, radiant_ch, use_arduino=True, channel_setting_manual=False):
         """
         connect signale generator channel 1 directly to radiant
@@ -53,18 +70,17 @@ class SigGenTest(RADIANTChannelTest):
             sg_ch_clock = self.conf['args']['sg_ch_direct_to_radiant']
             radiant_ch_clock = self.conf['args']['radiant_clock_channel']
             sg_ch = self.conf['args']['sg_ch_to_bridge']
-            if use_arduino:
-                self.arduino.route_signal_to_channel(radiant_ch)
 
         elif radiant_ch == self.conf['args']['radiant_clock_channel']:
             sg_ch_clock = self.conf['args']['sg_ch_to_bridge']
             radiant_ch_clock = self.conf['args']['radiant_clock_channel_alternative']
             sg_ch = self.conf['args']['sg_ch_direct_to_radiant']
-            if use_arduino:
-                self.arduino.route_signal_to_channel(radiant_ch_clock)
         else:
             raise ValueError("Invalid channel number")
 
+        if use_arduino:
+            self.route_signal(radiant_ch)
+
         if channel_setting_manual:
             self.logger.info(f'SigGen channel {sg_ch} --> radiant channel {radiant_ch}')
             confirm_or_abort()
@@ -76,17 +92,21 @@ class SigGenTest(RADIANTChannelTest):
 
         return sg_ch, sg_ch_clock, radiant_ch_clock
 
+    @timed
     def start_run(self, run_conf, start_up_time=10):
         station = self.device
-        station.set_run_conf(run_conf)
+        if run_conf is not None:  # None: the run configuration was already sent
+            station.set_run_conf(run_conf)
         daq_run = station.daq_run_start()
 
         # start for start up (before start sending triggers)
-        time.sleep(start_up_time)
+        with span("start_up_time"):
+            time.sleep(start_up_time)
 
         return daq_run
 
 
+    @timed
     def finish_run(self, daq_run, delete_src=False):
         station = self.device
         station.daq_run_wait()
@@ -97,9 +117,16 @@ class SigGenTest(RADIANTChannelTest):
 
         return data_dir
 
+    def rootify(self, data_dir):
+        """ Converts the data of a run into `combined.root` and returns its path """
+        if not is_simulated(self.device):  # the simulated station writes combined.root directly
+            stationrc.common.rootify(data_dir, self.device.station_conf["daq"]["mattak_directory"])
+        return data_dir / "combined.root"
+
+    @timed
     def initialize_config(self, channel_trigger, threshold, diode_Vbias=1.25, run_length=None, comment="", readout_channel=None):
         self.logger.info(f'trigger set on channel {channel_trigger}')
-        run = stationrc.remote_control.Run(self.device)
+        run = create_run(self.device)
         for ch in range(24):
             run.run_conf.radiant_threshold_initial(ch, threshold)
             run.run_conf.radiant_analog_diode_vbias(ch, diode_Vbias)
@@ -0,0 +1,337 @@
+import gzip
+import logging
+import pathlib
+import tempfile
+import time
+
+import numpy as np
+
+from .radiant_helper import RADIANT_NUM_CHANNELS, get_channels_for_quad
+
+try:
+    import uproot
+except ImportError:
+    uproot = None
+
+
+RADIANT_NUM_SAMPLES = 2048
+RADIANT_NUM_WINDOWS = 32
+RADIANT_NUM_PEDESTAL_SAMPLES = 4096
+
+
+def _encode_date_version(date, version):
+    """ Inverse of `stationrc.radiant.DateVersion` """
+    year, month, day = [int(ele) for ele in date.split("-")]
+    major, minor, rev = [int(ele) for ele in version.split(".")]
+    return ((year - 2000) << 25) | (month << 21) | (day << 16) | (major << 12) | (minor << 8) | rev
+
+
+def _encode_string(string):
+    """ Inverse of `stationrc.radiant.register_to_string` """
+    return int.from_bytes(string.encode(), "big")
+
+
+class SimulatedRunConf(object):
+    """ Records the settings of a run (same setters as the run configuration of stationrc) """
+
+    def __init__(self):
+        self.settings = dict()
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+
+        def setter(*args):
+            if len(args) == 2:  # per channel settings, e.g. radiant_threshold_initial(ch, threshold)
+                self.settings.setdefault(attr, dict())[args[0]] = args[1]
+            else:
+                self.settings[attr] = args[0] if len(args) == 1 else args
+
+        return setter
+
+
+class SimulatedRun(object):
+    """ Replaces `stationrc.remote_control.Run` for the simulated station """
+
+    def __init__(self, station):
+        self.station = station
+        self.run_conf = SimulatedRunConf()
+
+    def start(self, delete_src=False, rootify=False):
+        self.station.set_run_conf(self.run_conf)
+        daq_run = self.station.daq_run_start()
+        self.station.daq_run_wait()
+        self.station.retrieve_data(daq_run["data_dir"], delete_src=delete_src)
+        return pathlib.Path(self.station.station_conf["daq"]["data_directory"]) / pathlib.Path(daq_run["data_dir"]).parts[-1]
+
+
+class SimulatedLowLevelInterface(object):
+    """ Board manager and register access of the simulated RADIANT """
+
+    registers = {
+        "BM_ID": _encode_string("RDBM"),
+        "BM_DATEVERSION": _encode_date_version("2023-09-13", "0.2.19"),
+        "FPGA_ID": _encode_string("RDNT"),
+        "FPGA_DATEVERSION": _encode_date_version("2024-04-02", "0.6.0"),
+    }
+
+    voltages = {"1V0": 1.0, "1V8": 1.8, "2V5": 2.5, "2V6": 2.6, "3V1": 3.1}
+
+    def __init__(self, station):
+        self.station = station
+
+    def read_register(self, name):
+        self.station._wait("read_register")
+        return self.registers[name]
+
+    def board_manager_uptime(self):
+        return int(time.time() - self.station.start_time)
+
+    def board_manager_status(self):
+        return {f"POWER_GOOD_{voltage}": True for voltage in self.voltages}
+
+    def board_manager_voltage_readback(self):
+        return {f"VOLTAGE_{voltage}": v * (1 + self.station.rng.normal(0, 0.002))
+                for voltage, v in self.voltages.items()}
+
+    def calibration_load(self):
+        self.station._wait("calibration_load")
+
+
+class SimulatedStation(object):
+    """
+    Offline replacement of `stationrc.remote_control.VirtualStation` (see `get_radiant(simulate=True)`).
+    Implements the calls of the tests and returns synthetic data:
+
+    - Channels of the quad connected to the internal signal generator (`radiant_calselect`) see a sine
+      (or a pulse if configured with `pulse=True`) with `amplitude` ADC counts. All other channels see
+      `external_signal` ("sine", "pulse" or None) which stands in for the external signal generator.
+    - Every channel has gaussian noise with `noise_rms` ADC counts.
+    - Runs (`daq_run_start`, `retrieve_data`) produce `run_num_events` events in the data directory,
+      as `combined.root` (requires uproot) and `waveforms/000000.wf.dat.gz`.
+
+    `latencies` maps method names (and "event", the readout time per event) to a delay in seconds,
+    e.g. `SimulatedStation.typical_latencies`, to mimic the timing of a real station.
+    """
+    simulated = True
+
+    typical_latencies = {
+        "event": 0.01,
+        "daq_run_start": 2,
+        "daq_run_wait": 5,
+        "retrieve_data": 2,
+        "radiant_pedestal_get": 1,
+        "radiant_pedestal_update": 5,
+        "reset_radiant_board": 10,
+        "calibration_load": 2,
+        "radiant_calselect": 0.1,
+        "read_register": 0.01,
+    }
+
+    def __init__(self, host=None, data_directory=None, latencies=None, seed=None, noise_rms=20, amplitude=300,
+                 frequency=200, external_signal="sine", run_num_events=100, uid=0x51e7e5a7105000000000000000000001,
+                 sample_rate=3200):
+        self.host = host
+        self.logger = logging.getLogger("SimulatedStation")
+        self.rng = np.random.default_rng(seed)
+        self.latencies = latencies or dict()
+        self.noise_rms = noise_rms
+        self.amplitude = amplitude
+        self.frequency = frequency  # MHz, of the external signal
+        self.external_signal = external_signal
+        self.run_num_events = run_num_events
+        self.uid = uid
+        self.sample_rate = sample_rate  # MHz
+        self.start_time = time.time()
+
+        if data_directory is None:
+            data_directory = pathlib.Path(tempfile.gettempdir()) / "simulated_station" / str(host)
+        self.station_conf = {"daq": {"data_directory": str(data_directory), "mattak_directory": None}}
+
+        self.radiant_low_level_interface = SimulatedLowLevelInterface(self)
+
+        self.sig_gen = {"on": False, "pulse": False, "band": 0, "frequency": 100}
+        self.calselect_quad = None
+        self.surface_amps = False
+        self.pedestal_value = 1500
+        self.run_conf = None
+        self.run_number = 0
+
+        # Per sample pedestal response to the bias voltage (see BiasScan)
+        self._pedestal_slope = self.rng.normal(1.5, 0.01, (RADIANT_NUM_CHANNELS, RADIANT_NUM_PEDESTAL_SAMPLES))
+        self._pedestal_offset = self.rng.normal(-300, 20, (RADIANT_NUM_CHANNELS, RADIANT_NUM_PEDESTAL_SAMPLES))
+
+    def _wait(self, name, n=1):
+        latency = self.latencies.get(name, 0) * n
+        if latency:
+            time.sleep(latency)
+
+    # Board
+
+    def get_radiant_board_mcu_uid(self):
+        return self.uid
+
+    def get_radiant_board_dna(self):
+        return self.uid & 0xFFFFFFFFFFFFFFFF
+
+    def radiant_revision(self):
+        return 3
+
+    def radiant_sample_rate(self):
+        return self.sample_rate
+
+    def get_controller_board_monitoring(self):
+        return {
+            "voltages": {"radiant": 5000 + self.rng.normal(0, 5)},
+            "currents": {"radiant": 3500 + self.rng.normal(0, 20)},
+            "temps": {"micro": 30 + self.rng.normal(0, 1)},
+        }
+
+    def reset_radiant_board(self):
+        self._wait("reset_radiant_board")
+        self.sig_gen["on"] = False
+        self.calselect_quad = None
+
+    # Signal generator, switches and amplifiers
+
+    def radiant_sig_gen_off(self):
+        self.sig_gen["on"] = False
+
+    def radiant_sig_gen_on(self):
+        self.sig_gen["on"] = True
+
+    def radiant_sig_gen_configure(self, pulse=False, band=0):
+        self.sig_gen["pulse"] = pulse
+        self.sig_gen["band"] = band
+
+    def radiant_sig_gen_set_frequency(self, frequency):
+        self.sig_gen["frequency"] = frequency
+
+    def radiant_calselect(self, quad=None):
+        self._wait("radiant_calselect")
+        self.calselect_quad = quad
+
+    def surface_amps_power_on(self):
+        self.surface_amps = True
+
+    def surface_amps_power_off(self):
+        self.surface_amps = False
+
+    # Pedestals
+
+    def radiant_pedestal_set(self, value):
+        self.pedestal_value = value
+
+    def radiant_pedestal_update(self):
+        self._wait("radiant_pedestal_update")
+
+    def radiant_pedestal_get(self):
+        self._wait("radiant_pedestal_get")
+        pedestals = (self._pedestal_slope * self.pedestal_value + self._pedestal_offset +
+                     self.rng.normal(0, 0.5, self._pedestal_slope.shape))
+        # The pedestals are the average of 512 readouts
+        return (np.around(pedestals * 512) / 512).tolist()
+
+    # Data taking
+
+    def _signal(self, kind, frequency, n_events):
+        """ Returns `n_events` waveforms of a sine (frequency in MHz, random phase) or a pulse """
+        t = np.arange(RADIANT_NUM_SAMPLES) / (self.sample_rate / 1000)  # ns
+        if kind == "sine":
+            phase = self.rng.uniform(0, 2 * np.pi, (n_events, 1))
+            return self.amplitude * np.sin(2 * np.pi * frequency / 1000 * t + phase)
+        elif kind == "pulse":
+            t0 = t[RADIANT_NUM_SAMPLES // 2] + self.rng.normal(0, 0.3, (n_events, 1))
+            x = (t - t0) / 0.5
+            return self.amplitude * -x * np.exp(0.5 - 0.5 * x ** 2)  # normalised derivative of a gaussian
+        return np.zeros((n_events, RADIANT_NUM_SAMPLES))
+
+    def _record_waveforms(self, n_events):
+        """ Returns waveforms (events, channels, samples) in ADC counts """
+        waveforms = self.rng.normal(0, self.noise_rms, (n_events, RADIANT_NUM_CHANNELS, RADIANT_NUM_SAMPLES))
+
+        channels = set(range(RADIANT_NUM_CHANNELS))
+        if self.sig_gen["on"] and self.calselect_quad is not None:
+            cal_channels = get_channels_for_quad(self.calselect_quad)
+            kind = "pulse" if self.sig_gen["pulse"] else "sine"
+            for ch in cal_channels:
+                waveforms[:, ch] += self._signal(kind, self.sig_gen["frequency"], n_events)
+            channels -= set(cal_channels)
+
+        if self.external_signal is not None:
+            for ch in channels:
+                waveforms[:, ch] += self._signal(self.external_signal, self.frequency, n_events)
+
+        return np.around(waveforms).astype(np.int32)
+
+    def _record_start_windows(self, n_events):
+        start = self.rng.integers(0, RADIANT_NUM_WINDOWS, (n_events, RADIANT_NUM_CHANNELS))
+        return np.stack([start, (start + RADIANT_NUM_WINDOWS // 2) % RADIANT_NUM_WINDOWS], axis=-1)
+
+    def daq_record_data(self, num_events=1, force_trigger=True, force_trigger_interval=1, use_uart=False,
+                        read_header=False, trigger_channels=None, trigger_threshold=None):
+        self._wait("event", num_events)
+
+        waveforms = self._record_waveforms(num_events)
+        data = {"WAVEFORM": [{"radiant_waveforms": waveform} for waveform in waveforms]}
+        if read_header:
+            start_windows = self._record_start_windows(num_events)
+            now = time.time()
+            data["HEADER"] = [
+                {"event_number": idx, "readout_time": now + idx * force_trigger_interval,
+                 "radiant_start_windows": windows.tolist()}
+                for idx, windows in enumerate(start_windows)]
+
+        return {"data": data}
+
+    # Runs
+
+    def set_run_conf(self, run_conf):
+        self.run_conf = run_conf
+
+    def daq_run_start(self):
+        self._wait("daq_run_start")
+        self.run_number += 1
+        return {"data_dir": f"/data/simulated/run{self.run_number}"}
+
+    def daq_run_wait(self):
+        self._wait("daq_run_wait")
+
+    def retrieve_data(self, src, delete_src=False):
+        self._wait("retrieve_data")
+        data_dir = pathlib.Path(self.station_conf["daq"]["data_directory"]) / pathlib.PurePosixPath(src).name
+        (data_dir / "waveforms").mkdir(parents=True, exist_ok=True)
+
+        n_events = self.run_num_events
+        waveforms = self._record_waveforms(n_events)
+
+        with gzip.open(data_dir / "waveforms" / "000000.wf.dat.gz", "wb") as f:
+            f.write(waveforms.astype(np.int16).tobytes())
+
+        if uproot is None:
+            self.logger.warning(f"uproot is not installed, did not write {data_dir / 'combined.root'}")
+            return
+
+        settings = {} if self.run_conf is None else self.run_conf.settings
+        thresholds = np.zeros((n_events, RADIANT_NUM_CHANNELS), dtype=np.uint32)
+        for ch, threshold in settings.get("radiant_threshold_initial", {}).items():
+            thresholds[:, ch] = int(threshold * (2 ** 24 - 1) / 2.5)
+
+        rf0_trigger = settings.get("radiant_trigger_rf0_enable", False)
+        readout_time = time.time() + np.arange(n_events) * settings.get("radiant_trigger_soft_interval", 1)
+
+        # Branch paths of the files combined by mattak, fixed size arrays without their dimensions
+        # (see radiant_helper.open_combined)
+        branches = {
+            "waveforms/radiant_data": waveforms.astype(np.int16),
+            "header/event_number": np.arange(n_events, dtype=np.int32),
+            "header/readout_time": readout_time,
+            "header/trigger_time": readout_time,
+            "header/trigger_info/trigger_info.radiant_trigger": np.full(n_events, rf0_trigger),
+            "header/trigger_info/trigger_info.which_radiant_trigger":
+                np.full(n_events, 0 if rf0_trigger else -1, dtype=np.int32),
+            "daqstatus/radiant_thresholds": thresholds,
+        }
+        with uproot.recreate(data_dir / "combined.root") as f:
+            tree = f.mktree("combined", {name: (value.dtype, value.shape[1:]) for name, value in branches.items()})
+            tree.extend(branches)
@@ -1,15 +1,21 @@
 import colorama
+import contextlib
 import datetime
 import enum
 import json
 import logging
+import os
 import pathlib
+import sqlite3
 from radiant_test.radiant_helper import uid_to_name
-from .util import get_timestamp
+from .arrays import load_result, store_large_arrays
+from .journal import MeasurementJournal
+from .profiling import TestProfiler
+from .result_index import ResultIndex
+from .timing import Span
+from .util import ResultEncoder, get_timestamp
 import copy
 
-# Define tests here which have large ouput dicts (will not be stored with indent=4)
-tests_with_large_output = ["BiasScan"]
 
 class TestResult(enum.Enum):
     PASS = enum.auto()
@@ -18,13 +24,29 @@ class TestResult(enum.Enum):
 
 
 class Test(object):
+    # Hardware resources used by the test (see radiant_test.parallel.resource_lock)
+    resources = []
+    # Names of results the test consumes / produces. Used by the TestSet to order tests.
+    inputs = []
+    outputs = []
+
     def __init__(self, device=None, comment=None):
         self.device = device
         self.name = self.__class__.__name__
         self.basename = self.__class__.__name__
         self.logger = logging.getLogger(self.name)
         self.result = TestResult.DID_NOT_RUN
-        self.result_dict = {"dut_uid": None, "test_name": self.name, "comments": comment, "testset": None}
+        # "basename" is the class of the test, "test_name" its (possibly renamed) name in a TestSet
+        self.result_dict = {"dut_uid": None, "test_name": self.name, "basename": self.basename,
+                            "comments": comment, "testset": None}
+        self.result_dir = "results"
+        self.journal = None
+        # Set by the TestSet (radiant_test.artifacts.ArtifactRegistry), None if the test runs standalone
+        self.artifacts = None
+        # Timing of the phases of the test (see `phase`)
+        self.timing = Span(self.name)
+        # Set by `enable_profiling`
+        self.profiler = None
 
         with open(pathlib.Path.cwd() / "testconfig" / f"{self.name}.json", "r") as f:
             self.conf = json.load(f)
@@ -35,10 +57,47 @@ class Test(object):
         self.logger.debug(f"Test site from: {self.site_conf}")
 
     def add_measurement(self, name, value, passed):
-        self.result_dict["run"]["measurements"][name] = {
-            "measured_value": value,
-            "result": TestResult.PASS if passed else TestResult.FAIL,
-        }
+        result = TestResult.PASS if passed else TestResult.FAIL
+
+        fname = self._get_result_fname(self.result_dir)
+
+        # The measured value is written to the journal right away, only the result is kept in memory
+        if self.journal is None:
+            header = {key: value for key, value in self.result_dict.items() if key != "run"}
+            header["run"] = {"timestamp": self.result_dict["run"]["timestamp"]}
+            header["config"] = self.conf
+            self.journal = MeasurementJournal(fname.with_suffix(MeasurementJournal.suffix), header)
+
+        # Large arrays (waveforms, scans, ...) are stored in binary files next to the result file
+        value = store_large_arrays(value, fname.with_suffix(".arrays"), name)
+
+        self.journal.append(name, value, result.name)
+        self.result_dict["run"]["measurements"][name] = {"result": result}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """ Context manager which records the timing (and the profile) of a phase of the test (e.g. "run") """
+        with self.timing.child(name):
+            if self.profiler is None:
+                yield
+            else:
+                with self.profiler.phase(name):
+                    yield
+
+    def enable_profiling(self):
+        """ Profile the phases of the test (see radiant_test.profiling.TestProfiler) """
+        self.profiler = TestProfiler(self)
+
+    def publish_artifact(self, name, value, **keys):
+        """ Make an output available to later tests of the TestSet (no-op if the test runs standalone) """
+        if self.artifacts is not None:
+            self.artifacts.publish(name, self.result_dict["dut_uid"], value, **keys)
+
+    def get_artifact(self, name, **keys):
+        """ Returns an output published by an earlier test of the TestSet or None """
+        if self.artifacts is None:
+            return None
+        return self.artifacts.get(name, self.result_dict["dut_uid"], **keys)
 
     def update_conf(self, alt_conf):
         def update_test_conf(section, alt_conf):
@@ -99,8 +158,8 @@ class Test(object):
         # store config
         self.result_dict["config"] = self.conf
 
-        self._log_result()
         self._save_result(result_dir)
+        self._log_result()
 
 
     @staticmethod
@@ -146,31 +205,100 @@ class Test(object):
             print_func = print
 
         failed = self.result == TestResult.FAIL
+        verbose_func = self.get_verbose_func()
+
+        result_dict = self.result_dict
+        if failed and verbose_func is not None:
+            # The measured values are only stored in the result file
+            result_dict = load_result(self.fname)
+
         self.print_result(
             self.name,
-            self.result_dict,
+            result_dict,
             failed_only=failed,
             verbose=failed,
             print_func=print_func,
-            verbose_func=self.get_verbose_func()
+            verbose_func=verbose_func
         )
 
 
+    def _get_result_fname(self, result_dir):
+        return (pathlib.Path.cwd() / result_dir /
+            f'{uid_to_name(self.result_dict["dut_uid"])}_{self.name}_'
+            f'{datetime.datetime.fromtimestamp(self.result_dict["initialize"]["timestamp"]).strftime("%Y%m%dT%H%M%S")}.json')
+
+    def _get_measurement(self, name):
+        measurement = self.result_dict["run"]["measurements"][name]
+        if "measured_value" in measurement:
+            return measurement
+        return self.journal.read(name)
+
+    def _iter_result_json(self, indent=None):
+        """
+        Encodes the result dict as JSON (same output as `json.dump`). The measurements are read
+        from the journal one at a time, i.e., never all measured values are in memory.
+        """
+        separator = ", " if indent is None else ","
+
+        def encode(obj, level):
+            if indent is None:
+                return json.dumps(obj, cls=ResultEncoder)
+            return json.dumps(obj, cls=ResultEncoder, indent=indent).replace("\n", "\n" + " " * indent * level)
+
+        def iter_dict(items, level):
+            # items: pairs of key and an iterable of encoded chunks of the value
+            newline = "" if indent is None else "\n" + " " * indent * (level + 1)
+            empty = True
+            yield "{"
+            for key, chunks in items:
+                yield ("" if empty else separator) + newline + json.dumps(key) + ": "
+                yield from chunks
+                empty = False
+            if not empty and indent is not None:
+                yield "\n" + " " * indent * level
+            yield "}"
+
+        def iter_run(run):
+            for key, value in run.items():
+                if key == "measurements":
+                    yield key, iter_dict(
+                        ((name, [encode(self._get_measurement(name), 3)]) for name in value), 2)
+                else:
+                    yield key, [encode(value, 2)]
+
+        def iter_result_dict():
+            for key, value in self.result_dict.items():
+                if key == "run":
+                    yield key, iter_dict(iter_run(value), 1)
+                else:
+                    yield key, [encode(value, 1)]
+
+        return iter_dict(iter_result_dict(), 0)
+
     def _save_result(self, result_dir):
-        global tests_with_large_output
         dir = pathlib.Path.cwd() / result_dir
         if not dir.exists():
             dir.mkdir(parents=True)
 
-        self.fname = (dir /
-            f'{uid_to_name(self.result_dict["dut_uid"])}_{self.name}_'
-            f'{datetime.datetime.fromtimestamp(self.result_dict["initialize"]["timestamp"]).strftime("%Y%m%dT%H%M%S")}.json')
+        self.fname = self._get_result_fname(result_dir)
 
         self.logger.info(f"Store test results in {self.fname}")
 
-        if self.name in tests_with_large_output:
-            with open(self.fname, "w",) as f:
-                json.dump(self.result_dict, f)
-        else:
-            with open(self.fname, "w",) as f:
-                json.dump(self.result_dict, f, indent=4)
+        # finalize is still running, its duration is the time until the result is stored
+        self.result_dict["timing"] = self.timing.to_dict()
+
+        # Write to a temporary file first, a result file only exists if it is complete
+        tmp_fname = self.fname.with_suffix(".json.tmp")
+        with open(tmp_fname, "w") as f:
+            for chunk in self._iter_result_json(indent=4):
+                f.write(chunk)
+        os.replace(tmp_fname, self.fname)
+
+        if self.journal is not None:
+            self.journal.remove()
+            self.journal = None
+
+        try:
+            ResultIndex().add(self.fname, self.result_dict, base_test=self.basename)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not add {self.fname} to the result index: {e}")
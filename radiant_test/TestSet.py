@@ -1,10 +1,19 @@
+import concurrent.futures
+import contextlib
 import datetime
 import json
+import logging
 import pathlib
+import time
+
+from .RADIANTTest import RADIANTTest
+from .artifacts import ArtifactRegistry
+from .Test import TestResult
+from .parallel import resource_lock
 
 
 class TestSet(object):
-    def __init__(self, filename, device=None, comment=None):
+    def __init__(self, filename, device=None, comment=None, tag=None, result_dir=None):
         self.device = device
         with open(filename, "r") as f:
             self.conf = json.load(f)
@@ -14,10 +23,21 @@ class TestSet(object):
             default_args = self.conf["default_args"]
 
         self.name = self.conf["name"]
-        self._result_dir_name = f"{self.name}_{datetime.datetime.now().strftime('%Y%m%dT%H%M%S')}"
-        self.result_dir = pathlib.Path("results") / self._result_dir_name
+        if result_dir is None:
+            # The tag (e.g. the host name) keeps the result directories of sets running in parallel apart
+            name = self.name if tag is None else f"{self.name}_{tag}"
+            self._result_dir_name = f"{name}_{datetime.datetime.now().strftime('%Y%m%dT%H%M%S')}"
+            self.result_dir = pathlib.Path("results") / self._result_dir_name
+        else:
+            # Continue in the result directory of a previous execution of this set
+            self.result_dir = pathlib.Path(result_dir)
+            if not self.result_dir.is_dir():
+                raise FileNotFoundError(f"Result directory {self.result_dir} does not exist")
+            self._result_dir_name = self.result_dir.name
 
         self.tests = list()
+        # Outputs of tests which are used by later tests
+        self.artifacts = ArtifactRegistry()
 
         module = __import__("tests")
         for key in self.conf["tests"].keys():
@@ -37,20 +57,244 @@ class TestSet(object):
                 )
                 self.tests[-1].name = key
                 self.tests[-1].result_dict["test_name"] = key
+                self.tests[-1].timing.name = key
 
             if comment is not None:
                 self.tests[-1].result_dict["comments"] = comment
 
             self.tests[-1].result_dict["testset"] = self._result_dir_name
+            self.tests[-1].result_dir = self.result_dir
+            self.tests[-1].artifacts = self.artifacts
 
     def add_test(self, test, alt_conf):
         if alt_conf:
             test.update_conf(alt_conf)
         self.tests.append(test)
 
-    def run(self):
+    def load_results(self):
+        """ Returns the result (e.g. "PASS") of every test which has a finalized result file in the result directory """
+        results = dict()
+        for fname in self.result_dir.glob("*.json"):
+            try:
+                with open(fname, "r") as f:
+                    result_dict = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Could not read {fname}: {e}")
+                continue
+
+            if "result" not in result_dict:
+                continue
+
+            # If a test was run several times, the newest result counts
+            name = result_dict["test_name"]
+            timestamp = result_dict["initialize"]["timestamp"]
+            if name not in results or timestamp > results[name][0]:
+                results[name] = (timestamp, result_dict["result"])
+
+        return {name: result for name, (_, result) in results.items()}
+
+    def skip_finished(self, rerun_failed=False):
+        """
+        Remove all tests from the set which already have a result in the result directory (resume
+        an interrupted set). With `rerun_failed`, only tests which passed are removed, i.e., tests
+        which failed, did not run or have no result at all are executed again.
+        """
+        results = self.load_results()
+        # Results recovered from a journal (DID_NOT_RUN) are incomplete, those tests always run again
+        finished = [TestResult.PASS.name] if rerun_failed else [TestResult.PASS.name, TestResult.FAIL.name]
+
+        tests = list()
         for test in self.tests:
-            test.device = self.device
-            test.initialize()
-            test.run()
-            test.finalize(result_dir=self.result_dir)
+            if test.name in results and results[test.name] in finished:
+                logging.info(f"Skip {test.name}, found result {results[test.name]} in {self.result_dir}")
+            else:
+                tests.append(test)
+        self.tests = tests
+
+    def get_dependencies(self):
+        """
+        Returns for each test the indices of the tests which have to be finished before it can start.
+        A test depends on all earlier tests which produce one of its inputs or share a hardware
+        resource with it (the latter keeps the order of the hardware tests as defined in the set).
+        """
+        dependencies = list()
+        for idx, test in enumerate(self.tests):
+            dependencies.append({
+                jdx for jdx, other in enumerate(self.tests[:idx])
+                if set(test.inputs) & set(other.outputs) or set(test.resources) & set(other.resources)})
+        return dependencies
+
+    def _run_test(self, test):
+        test.device = self.device
+        try:
+            self._run_test_phases(test)
+        finally:
+            if test.profiler is not None:
+                test.profiler.stop()
+
+    def _run_test_phases(self, test):
+
+        # Even tests which only analyse data read the board identity in `initialize`
+        init_resources = test.resources
+        if isinstance(test, RADIANTTest) and "station" not in init_resources:
+            init_resources = init_resources + ["station"]
+
+        with contextlib.ExitStack() as stack:
+            with test.phase("wait_for_resources"):
+                stack.enter_context(resource_lock(*init_resources))
+            with test.phase("initialize"):
+                test.initialize()
+
+        with contextlib.ExitStack() as stack:
+            with test.phase("wait_for_resources"):
+                stack.enter_context(resource_lock(*test.resources))
+            with test.phase("run"):
+                test.run()
+            with test.phase("finalize"):
+                test.finalize(result_dir=self.result_dir)
+
+        if test.profiler is not None:
+            test.profiler.write()
+
+    def run(self, sequential=False, profile=False):
+        """
+        Run all tests of the set. Tests are scheduled according to their dependencies, i.e. tests
+        which do not use the hardware run concurrently with the hardware tests. With `sequential`
+        all tests are run one after the other in the order of the set config. With `profile` every
+        test is profiled (see radiant_test.profiling), this implies `sequential`.
+        """
+        if profile:
+            if not sequential:
+                logging.info("Profiling: run the tests sequentially")
+            sequential = True
+            for test in self.tests:
+                test.enable_profiling()
+
+        # The board may have been exchanged or power cycled since the last set, read its identity again
+        # and forget the shadowed state (see radiant_test.station_cache and radiant_test.station_shadow)
+        if hasattr(self.device, "invalidate_board_identity"):
+            self.device.invalidate_board_identity()
+        if hasattr(self.device, "invalidate_state"):
+            self.device.invalidate_state()
+
+        start = time.time()
+        try:
+            self._run(sequential)
+        finally:
+            self.write_timing_report(start, time.time())
+
+    def _run(self, sequential):
+        if sequential:
+            for test in self.tests:
+                self._run_test(test)
+            return
+
+        dependencies = self.get_dependencies()
+        pending = list(range(len(self.tests)))
+        finished = set()
+        running = dict()
+        error = None
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(len(self.tests), 1), thread_name_prefix=self.name) as executor:
+            while pending or running:
+                if error is None:
+                    for idx in [idx for idx in pending if dependencies[idx] <= finished]:
+                        pending.remove(idx)
+                        running[executor.submit(self._run_test, self.tests[idx])] = idx
+                elif pending:
+                    logging.error(f"Skip {[self.tests[idx].name for idx in pending]} because of a previous error")
+                    pending.clear()
+
+                if not running:
+                    break
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    idx = running.pop(future)
+                    if future.exception() is not None:
+                        logging.error(f"Test {self.tests[idx].name} failed: {future.exception()}")
+                        error = error or future.exception()
+                    else:
+                        finished.add(idx)
+
+        if error is not None:
+            raise error
+
+    def get_timing_report(self, start, end):
+        """
+        Summarises the timing of the tests: the wall time of the set, the dead time (no test was
+        active, waiting for resources does not count as active), the time the station was idle and
+        the critical path (chain of dependencies which ended last).
+        """
+        def union_length(intervals):
+            length = 0
+            current_start, current_end = None, None
+            for interval_start, interval_end in sorted(intervals):
+                if current_end is None or interval_start > current_end:
+                    if current_end is not None:
+                        length += current_end - current_start
+                    current_start, current_end = interval_start, interval_end
+                else:
+                    current_end = max(current_end, interval_end)
+            if current_end is not None:
+                length += current_end - current_start
+            return length
+
+        tests = dict()
+        busy = []
+        station_busy = []
+        for idx, test in enumerate(self.tests):
+            test_start, test_end = test.timing.get_interval()
+            if test_start is None:
+                continue
+
+            phases = dict()
+            for phase in test.timing.children:
+                phases[phase.name] = phases.get(phase.name, 0) + phase.duration
+                if phase.name != "wait_for_resources":
+                    busy.append(phase.get_interval())
+                    if "station" in test.resources or phase.name == "initialize" and isinstance(test, RADIANTTest):
+                        station_busy.append(phase.get_interval())
+
+            tests[idx] = {"name": test.name, "start": test_start - start, "end": test_end - start, "phases": phases}
+
+        # Walk back from the test which finished last along the dependencies which finished last
+        dependencies = self.get_dependencies()
+        critical_path = []
+        idx = max(tests, key=lambda idx: tests[idx]["end"], default=None)
+        while idx is not None:
+            critical_path.insert(0, tests[idx]["name"])
+            idx = max((jdx for jdx in dependencies[idx] if jdx in tests), key=lambda jdx: tests[jdx]["end"], default=None)
+
+        return {
+            "wall_time": end - start,
+            "dead_time": end - start - union_length(busy),
+            "station_idle_time": end - start - union_length(station_busy),
+            "critical_path": critical_path,
+            "tests": list(tests.values()),
+        }
+
+    def write_timing_report(self, start, end):
+        report = self.get_timing_report(start, end)
+
+        lines = [
+            f"Timing of test set {self.name}",
+            f"Wall time: {report['wall_time']:.1f} s, dead time: {report['dead_time']:.1f} s, "
+            f"station idle: {report['station_idle_time']:.1f} s",
+            f"Critical path: {' -> '.join(report['critical_path'])}",
+            "",
+            f"{'test':<30} {'start / s':>10} {'end / s':>10}  phases / s",
+        ]
+        for test in report["tests"]:
+            phases = ", ".join(f"{name}: {duration:.1f}" for name, duration in test["phases"].items())
+            lines.append(f"{test['name']:<30} {test['start']:>10.1f} {test['end']:>10.1f}  {phases}")
+
+        for line in lines[:3]:
+            logging.info(line)
+
+        self.result_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.result_dir / "timing_report.txt", "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        return report
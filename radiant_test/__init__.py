@@ -1,8 +1,11 @@
 from .RADIANTChannelTest import RADIANTChannelTest
 from .RADIANTTest import RADIANTTest
 from .Test import Test
+from .arrays import load_result
 from .TestSet import TestSet
+from .SimulatedStation import SimulatedStation
 from .run import run
+from .parallel import resource_lock, run_parallel
 from .radiant_helper import (
     RADIANT_NUM_CHANNELS,
     RADIANT_NUM_QUADS,
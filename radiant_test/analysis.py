@@ -0,0 +1,465 @@
+import functools
+import json
+import pathlib
+
+import numpy as np
+import scipy.fft
+import scipy.optimize
+import scipy.signal
+
+
+def _sliding_extrema(data, width, n_windows):
+    """
+    Running maximum and minimum over windows of `width` samples starting at every sample of the
+    last axis of `data` (which has to hold at least `n_windows + width - 1` samples). Uses the van
+    Herk / Gil-Werman algorithm: the samples are split into blocks of `width`, every window is
+    covered by the suffix of one block and the prefix of the next one, i.e. O(n) for any width.
+    """
+    n_blocks = -(-(n_windows + width - 1) // width)
+    pad = n_blocks * width - data.shape[-1]
+    if pad > 0:
+        # Repeating the last sample does not change the extrema of the windows which contain it
+        data = np.pad(data, [(0, 0)] * (data.ndim - 1) + [(0, pad)], mode="edge")
+    else:
+        data = data[..., :n_blocks * width]
+
+    blocks = data.reshape(data.shape[:-1] + (n_blocks, width))
+    extrema = []
+    for ufunc in (np.maximum, np.minimum):
+        prefix = ufunc.accumulate(blocks, axis=-1).reshape(data.shape)
+        suffix = ufunc.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(data.shape)
+        extrema.append(ufunc(suffix[..., :n_windows], prefix[..., width - 1:width - 1 + n_windows]))
+
+    return extrema
+
+
+def sliding_vpp(data, window_size=30, start_index=1400, end_index=1900):
+    """
+    Peak-to-peak amplitude (max - min) of the window `data[i - h:i + h]` (`h = window_size // 2`)
+    around every sample `i` in [`start_index`, `end_index`). Windows reaching over the ends of the
+    waveform are truncated.
+
+    Parameters
+    ----------
+
+    data: array (..., samples)
+        Waveforms, e.g. (events, samples) or (events, channels, samples)
+
+    Returns
+    -------
+
+    vpps: array (..., end_index - start_index)
+        The Vpp of the window around sample `start_index + j` is `vpps[..., j]`
+    """
+    data = np.asarray(data)
+    h = window_size // 2
+    if h < 1:
+        raise ValueError(f"Window size has to be at least 2 samples (got {window_size})")
+
+    n_samples = data.shape[-1]
+    end_index = min(end_index, n_samples)
+    if not 0 <= start_index < end_index:
+        raise ValueError(f"Invalid range of samples [{start_index}, {end_index}) for {n_samples} samples")
+
+    # Samples covered by all windows, truncated windows at the beginning are padded with the first sample
+    first, last = start_index - h, end_index - 1 + h
+    segment = data[..., max(first, 0):min(last, n_samples)]
+    if first < 0:
+        segment = np.pad(segment, [(0, 0)] * (data.ndim - 1) + [(-first, 0)], mode="edge")
+
+    maxima, minima = _sliding_extrema(segment, 2 * h, end_index - start_index)
+    return maxima - minima
+
+
+def max_sliding_vpp(data, window_size=30, start_index=1400, end_index=1900):
+    """
+    Maximum of `sliding_vpp` for every waveform of `data` (..., samples).
+
+    Returns
+    -------
+
+    max_vpps: array (...)
+        Maximal Vpp of every waveform
+
+    positions: array (...)
+        Sample index of the center of the window with the maximal Vpp (first one if not unique)
+    """
+    vpps = sliding_vpp(data, window_size=window_size, start_index=start_index, end_index=end_index)
+    positions = np.argmax(vpps, axis=-1)
+    return np.take_along_axis(vpps, positions[..., None], axis=-1)[..., 0], positions + start_index
+
+
+class RunningStats(object):
+    """
+    Count, mean and standard deviation of values in the bins of an array of shape `shape` (e.g.
+    channels x windows), accumulated batch by batch with the parallel Welford algorithm (Chan et
+    al.), i.e. the memory does not grow with the number of values.
+    """
+
+    def __init__(self, shape):
+        self.shape = tuple(np.atleast_1d(shape))
+        self.count = np.zeros(self.shape, dtype=int)
+        self.mean = np.zeros(self.shape)
+        self.m2 = np.zeros(self.shape)
+
+    def add(self, index, values):
+        """
+        Add `values` to the bins `index` (tuple of index arrays, one per dimension, broadcastable
+        to `values`, as for `np.add.at`).
+        """
+        *index, values = np.broadcast_arrays(*index, np.asarray(values, dtype=float))
+        bins = np.ravel_multi_index([idx.ravel() for idx in index], self.shape)
+        values = values.ravel()
+        size = int(np.prod(self.shape))
+
+        count = np.bincount(bins, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, np.bincount(bins, weights=values, minlength=size) / count, 0)
+        m2 = np.bincount(bins, weights=(values - mean[bins]) ** 2, minlength=size)
+        self._merge(count.reshape(self.shape), mean.reshape(self.shape), m2.reshape(self.shape))
+
+    def add_all(self, values):
+        """ Add `values` (n, *shape), i.e. n values to every bin """
+        values = np.asarray(values, dtype=float).reshape((-1,) + self.shape)
+        mean = np.mean(values, axis=0)
+        m2 = np.sum((values - mean) ** 2, axis=0)
+        self._merge(np.full(self.shape, len(values)), mean, m2)
+
+    def _merge(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(total > 0, self.mean + delta * count / total, 0)
+            self.m2 = np.where(total > 0, self.m2 + m2 + delta ** 2 * self.count * count / total, 0)
+        self.count = total
+
+    @property
+    def std(self):
+        """ Standard deviation (ddof=0, like `np.std`), 0 for empty bins """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, np.sqrt(self.m2 / self.count), 0)
+
+
+class StreamingLineFit(object):
+    """
+    Least-squares fits of lines `y = slope * x + intercept` for every element of an array of shape
+    `shape` (e.g. channels x samples) which share the x values. Points are added one x value at a
+    time, only the sums of the normal equations are kept (x is shifted by the first value for
+    numerical stability), i.e. the memory does not grow with the number of points.
+    """
+
+    def __init__(self, shape):
+        self.shape = tuple(np.atleast_1d(shape))
+        self.n = 0
+        self.x0 = None
+        self.sum_x = 0.
+        self.sum_xx = 0.
+        self.sum_y = np.zeros(self.shape)
+        self.sum_xy = np.zeros(self.shape)
+
+    def add(self, x, y):
+        """ Add the point `x` (scalar) with the values `y` (array of `shape`) """
+        if self.x0 is None:
+            self.x0 = float(x)
+        x = float(x) - self.x0
+        y = np.asarray(y, dtype=float)
+        self.n += 1
+        self.sum_x += x
+        self.sum_xx += x * x
+        self.sum_y += y
+        self.sum_xy += x * y
+
+    def parameters(self):
+        """ Returns the arrays of slopes and intercepts (nan if less than two distinct x values were added) """
+        denominator = self.n * self.sum_xx - self.sum_x ** 2
+        if self.n < 2 or denominator == 0:
+            return np.full(self.shape, np.nan), np.full(self.shape, np.nan)
+
+        slope = (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        intercept = (self.sum_y - slope * self.sum_x) / self.n - slope * self.x0
+        return slope, intercept
+
+
+def window_rms_stats(waveforms, starting_windows, upsampling=None, batch_size=100):
+    """
+    RMS of the 16 windows of every event (upsampled by `upsampling` if set), accumulated as mean
+    and std of the RMS of each of the 32 windows of the LAB4D (see WindowStability).
+
+    Parameters
+    ----------
+
+    waveforms: array (events, channels, samples)
+
+    starting_windows: array (events, channels)
+
+    batch_size: int
+        Number of events processed at once (limits the memory of the upsampling)
+
+    Returns
+    -------
+
+    stats: RunningStats (channels, 32)
+    """
+    n_channels = waveforms.shape[1]
+    stats = RunningStats((n_channels, 32))
+    idx_channels = np.arange(n_channels)[None, :, None]
+
+    for start in range(0, len(waveforms), batch_size):
+        wfs = waveforms[start:start + batch_size]
+        if upsampling:
+            wfs = scipy.signal.resample(wfs, upsampling * wfs.shape[-1], axis=-1)
+
+        # events, channels, windows
+        rms_per_window = np.std(wfs.reshape(wfs.shape[:-1] + (16, -1)), axis=-1)
+
+        starting_window = starting_windows[start:start + batch_size, :, None]
+        idx_windows = (np.arange(16) + starting_window) % 16 + 16 * (starting_window >= 16)
+
+        stats.add((idx_channels, idx_windows), rms_per_window)
+
+    return stats
+
+
+def window_variation(rms_per_window):
+    """
+    Returns the mean variation (std) of the RMS over the windows, the minimal and maximal mean RMS
+    of a window and the mean and std of the RMS per window.
+
+    `rms_per_window` is a measured value of WindowStability: the mean and std of the RMS per window
+    ({"count": ..., "mean": ..., "std": ...}) or, in older results, the RMS of all events per
+    window ({"<window>": [...], ...}).
+    """
+    if "mean" in rms_per_window:
+        mean = np.asarray(rms_per_window["mean"], dtype=float)
+        std = np.asarray(rms_per_window["std"], dtype=float)
+    else:
+        mean = np.zeros(32)
+        std = np.zeros(32)
+        for window, values in rms_per_window.items():
+            mean[int(window)] = np.mean(values)
+            std[int(window)] = np.std(values)
+
+    return np.mean(std), np.amin(mean), np.amax(mean), mean, std
+
+
+def connection_jump_widths(wfs, block_size, connection_points=(32, 64, 128)):
+    """
+    Width (std) of the jumps `trace[p - 1] - trace[p]` at the connection points `p` of every
+    128-sample chunk (see LAB4DGlitch), per block of `block_size` events.
+
+    `wfs` has the shape (events, channels, samples), returns (connection points, channels, blocks).
+    """
+    wfs = np.asarray(wfs)
+    n_events, n_channels = wfs.shape[:2]
+    n_blocks = int(np.ceil(n_events / block_size))
+    connection_points = np.asarray(connection_points)
+    n_chunks = wfs.shape[-1] // 128 - 1
+
+    # Jump across every connection point of every chunk
+    positions = (np.arange(n_chunks) * 128)[None, :] + connection_points[:, None]  # connections, chunks
+    jumps = (wfs[..., positions - 1] - wfs[..., positions]).astype(float)  # events, channels, connections, chunks
+
+    # connections, channels, blocks, (events of block, chunks), the last block is padded with nan
+    connection_jumps = np.full((n_blocks * block_size,) + jumps.shape[1:], np.nan)
+    connection_jumps[:n_events] = jumps
+    connection_jumps = connection_jumps.reshape(
+        (n_blocks, block_size) + jumps.shape[1:]).transpose(3, 2, 0, 1, 4).reshape(
+        len(connection_points), n_channels, n_blocks, block_size * n_chunks)
+
+    return np.sqrt(np.nanmean(
+        (connection_jumps - np.nanmean(connection_jumps, axis=-1, keepdims=True))**2, axis=-1))
+
+
+def fit_sine(wvf, frequency, sampling_rate):
+    """
+    Fits `amplitude * sin(2 pi frequency t + phase) + offset` to the waveform `wvf`, sampled with
+    `sampling_rate` (in GHz), starting at `frequency` (in GHz). Returns the parameters (amplitude,
+    frequency, phase, offset) and the mean absolute residual.
+    """
+    def sine(x, amplitude, frequency, phase, offset):
+        return amplitude * np.sin(2 * np.pi * frequency * x + phase) + offset
+
+    # Initial guess
+    offset = np.mean(wvf)
+    amplitude = np.max(wvf) - offset
+    popt, _ = scipy.optimize.curve_fit(
+        sine,
+        xdata=np.arange(len(wvf)) / sampling_rate,
+        ydata=wvf,
+        p0=[amplitude, frequency, 0, offset],
+    )
+    # Evaluated at the ADC values instead of the times, as the `avg_residual_max` goalposts of SigGenSine were
+    avg_residual = np.sum(np.abs(wvf - sine(np.asarray(wvf), *popt))) / len(wvf)
+    return popt, avg_residual
+
+
+class SpectrumAccumulator(object):
+    """
+    Running mean and standard deviation of the amplitude spectra (`|rfft|` along the last axis)
+    of blocks of waveforms (events, channels, samples) (or (events, samples)), i.e. the memory does
+    not depend on the number of events. The waveforms are transformed in batches of `batch_size`
+    events.
+
+    With `sampling_rate` the spectra are normalized like `NuRadioReco.utilities.fft.time2freq`
+    (`rfft / sampling_rate * sqrt(2)`) and `frequencies` are in units of the sampling rate.
+    """
+
+    def __init__(self, n_samples, sampling_rate=None, batch_size=100):
+        self.n_samples = n_samples
+        self.sampling_rate = sampling_rate
+        self.batch_size = batch_size
+        self.frequencies = np.fft.rfftfreq(n_samples, 1 if sampling_rate is None else 1 / sampling_rate)
+        self._stats = None
+
+    def add(self, wfs):
+        """ Add the spectra of the waveforms `wfs` (events, ..., samples) """
+        wfs = np.asarray(wfs)
+        if self._stats is None:
+            self._stats = RunningStats(wfs.shape[1:-1] + self.frequencies.shape)
+
+        for start in range(0, len(wfs), self.batch_size):
+            spectra = np.abs(np.fft.rfft(wfs[start:start + self.batch_size], n=self.n_samples, axis=-1))
+            if self.sampling_rate is not None:
+                spectra *= 2 ** 0.5 / self.sampling_rate
+            self._stats.add_all(spectra)
+
+    @property
+    def n_events(self):
+        return 0 if self._stats is None else int(self._stats.count.flat[0])
+
+    @property
+    def mean(self):
+        """ Mean spectrum (..., frequencies) """
+        return self._stats.mean
+
+    @property
+    def std(self):
+        """ Standard deviation of the spectra (..., frequencies) """
+        return self._stats.std
+
+
+class CorrelationTemplate(object):
+    """
+    Template for the normalized cross-correlation with recorded waveforms (see `max_correlation`).
+    The template is cut to a window of `window_size` (in s) around its maximum (1/3 before, 2/3
+    after) for waveforms with `sampling_rate` (in Hz). The windowed template, its norm and its
+    spectra (per FFT length) are computed once.
+    """
+
+    def __init__(self, waveform, sampling_rate=3.2e9, window_size=200e-9, name=None):
+        waveform = np.asarray(waveform, dtype=float)
+        window_steps = window_size * sampling_rate
+
+        max_amp_i = int(np.argmax(np.abs(waveform)))
+        lower_bound = max(int(max_amp_i - window_steps / 3), 0)
+        upper_bound = int(max_amp_i + 2 * window_steps / 3)
+
+        self.name = name
+        self.sampling_rate = sampling_rate
+        self.trace = waveform[lower_bound:upper_bound]
+        self.norm = np.linalg.norm(self.trace)
+        self._spectra = dict()
+
+    def __len__(self):
+        return len(self.trace)
+
+    def spectrum(self, n_fft):
+        """ Complex conjugate of the spectrum of the template zero-padded to `n_fft` samples """
+        if n_fft not in self._spectra:
+            self._spectra[n_fft] = np.conj(scipy.fft.rfft(self.trace, n=n_fft))
+        return self._spectra[n_fft]
+
+
+@functools.lru_cache(maxsize=None)
+def load_template(fname, sampling_rate=3.2e9, window_size=200e-9):
+    """
+    Returns the `CorrelationTemplate` of the waveform stored in the JSON file `fname` (key
+    "waveform" or "wf", e.g. the templates in `examples/`). Cached per file and sampling rate.
+    """
+    with open(fname, "r") as f:
+        data = json.load(f)
+
+    waveform = data.get("waveform", data.get("wf")) if isinstance(data, dict) else data
+    return CorrelationTemplate(waveform, sampling_rate=sampling_rate, window_size=window_size,
+                               name=pathlib.Path(fname).stem)
+
+
+def load_template_bank(fnames, sampling_rate=3.2e9, window_size=200e-9):
+    """ Returns the templates of all files `fnames` (or of all JSON files in the directory `fnames`) """
+    if isinstance(fnames, (str, pathlib.Path)) and pathlib.Path(fnames).is_dir():
+        fnames = sorted(pathlib.Path(fnames).glob("*.json"))
+    return [load_template(str(fname), sampling_rate, window_size) for fname in fnames]
+
+
+def _window_norms(wfs, length):
+    """ Norms of all windows of `length` samples of the waveforms zero-padded by `length - 1` samples on both sides """
+    squared = np.pad(wfs.astype(float) ** 2, [(0, 0), (length, length - 1)])
+    cumsum = np.cumsum(squared, axis=-1)
+    norms2 = cumsum[:, length:] - cumsum[:, :-length]
+    return np.sqrt(np.maximum(norms2, 0))
+
+
+def max_correlation(wfs, templates, threshold=0.1):
+    """
+    Maximal normalized cross-correlation of every waveform with the template(s), computed for all
+    waveforms in one FFT pass per template. As the correlation is normalized by the norm of the
+    data within the template window (running norm), only windows which overlap with the part of
+    the waveform above `threshold` times its maximum are considered.
+
+    Parameters
+    ----------
+
+    wfs: array (events, samples)
+
+    templates: CorrelationTemplate or list of them (template bank)
+
+    Returns
+    -------
+
+    max_correlations: array (events) or (templates, events)
+        Maximum of the absolute value of the correlation
+
+    time_differences: array (events) or (templates, events)
+        Time difference (in s) between the beginning of the template and the waveform at the maximum
+    """
+    single_template = isinstance(templates, CorrelationTemplate)
+    if single_template:
+        templates = [templates]
+
+    wfs = np.atleast_2d(np.asarray(wfs, dtype=float))
+    n_events, n_samples = wfs.shape
+
+    # Data above the threshold: first and last sample in the coordinates of the padded waveforms
+    above = np.abs(wfs) >= threshold * np.max(np.abs(wfs), axis=-1, keepdims=True)
+    first = np.argmax(above, axis=-1)
+    last = n_samples - 1 - np.argmax(above[:, ::-1], axis=-1)
+
+    max_length = max(len(template) for template in templates)
+    n_fft = scipy.fft.next_fast_len(n_samples + max_length - 1)
+    spectra = scipy.fft.rfft(wfs, n=n_fft, axis=-1)
+
+    max_correlations = np.zeros((len(templates), n_events))
+    time_differences = np.zeros((len(templates), n_events))
+    norms = dict()
+    for i_template, template in enumerate(templates):
+        length = len(template)
+        if length not in norms:
+            norms[length] = _window_norms(wfs, length)
+
+        # Correlation for the window starting at sample k of the waveform, k = -(length - 1) ... n_samples - 1
+        numerator = scipy.fft.irfft(spectra * template.spectrum(n_fft), n=n_fft, axis=-1)
+        numerator = np.concatenate([numerator[:, n_fft - length + 1:], numerator[:, :n_samples]], axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = np.abs(np.nan_to_num(numerator / (norms[length] * template.norm)))
+
+        # Only windows overlapping with the data above the threshold (as index in the padded waveform)
+        starts = np.arange(correlation.shape[-1])
+        correlation[(starts < first[:, None]) | (starts > last[:, None] + length - 2)] = -1
+
+        max_corr_i = np.argmax(correlation, axis=-1)
+        max_correlations[i_template] = correlation[np.arange(n_events), max_corr_i]
+        time_differences[i_template] = (max_corr_i - length) / template.sampling_rate
+
+    if single_template:
+        return max_correlations[0], time_differences[0]
+    return max_correlations, time_differences
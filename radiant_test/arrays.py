@@ -0,0 +1,92 @@
+import json
+import pathlib
+import re
+
+import numpy as np
+
+
+# Numeric arrays with at least this many elements are stored in a binary sidecar instead of the JSON file
+LARGE_ARRAY_SIZE = 1024
+
+ARRAY_KEY = "__ndarray__"
+
+
+def _estimate_size(value):
+    """ Estimate the number of elements of a (nested) list from its first elements """
+    size = 1
+    while isinstance(value, (list, tuple, np.ndarray)):
+        if len(value) == 0:
+            return 0
+        size *= len(value)
+        value = value[0]
+    return size
+
+
+def _to_array(value):
+    """ Returns `value` as numeric numpy array or None if it is not a (rectangular) numeric array """
+    if isinstance(value, np.ndarray):
+        array = value
+    else:
+        try:
+            array = np.asarray(value)
+        except ValueError:  # ragged nested lists
+            return None
+
+    if array.dtype.kind not in "biuf":
+        return None
+
+    # Use fixed and compact dtypes for data which was stored as python lists
+    if not isinstance(value, np.ndarray):
+        if array.dtype.kind in "iu" and array.size and \
+                np.iinfo(np.int32).min <= array.min() and array.max() <= np.iinfo(np.int32).max:
+            array = array.astype(np.int32)
+        elif array.dtype.kind == "f":
+            array = array.astype(np.float64)
+
+    return array
+
+
+def store_large_arrays(value, directory, prefix, min_size=LARGE_ARRAY_SIZE):
+    """
+    Replace all large numeric arrays (numpy arrays or nested lists of numbers) in `value` by
+    references to binary `.npy` files in `directory`. The references are relative to the parent
+    of `directory`, i.e., the directory of the result file.
+
+    Returns the modified value (dicts and lists are copied, the input is not changed).
+    """
+    directory = pathlib.Path(directory)
+
+    def store(value, key_path):
+        if isinstance(value, (list, tuple, np.ndarray)) and _estimate_size(value) >= min_size:
+            array = _to_array(value)
+            if array is not None:
+                directory.mkdir(parents=True, exist_ok=True)
+                name = re.sub(r"[^\w.-]", "_", ".".join([prefix] + key_path)) + ".npy"
+                np.save(directory / name, array)
+                return {ARRAY_KEY: f"{directory.name}/{name}", "dtype": array.dtype.str, "shape": list(array.shape)}
+
+        if isinstance(value, dict):
+            return {key: store(ele, key_path + [str(key)]) for key, ele in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return [store(ele, key_path + [str(idx)]) for idx, ele in enumerate(value)]
+        return value
+
+    return store(value, [])
+
+
+def load_result(filename, mmap_mode="c", as_lists=False):
+    """
+    Load a result file and all arrays referenced from it. By default the arrays are memory-mapped
+    (copy-on-write, i.e., modifications are not written back to the file), with `as_lists` they are
+    converted to (nested) python lists as if they were stored in the JSON.
+    """
+    base = pathlib.Path(filename).parent
+
+    def object_hook(dct):
+        if ARRAY_KEY in dct:
+            array = np.load(base / dct[ARRAY_KEY], mmap_mode=None if as_lists else mmap_mode)
+            return array.tolist() if as_lists else array
+        return dct
+
+    with open(filename, "r") as f:
+        return json.load(f, object_hook=object_hook)
@@ -0,0 +1,30 @@
+import threading
+
+
+class ArtifactRegistry(object):
+    """
+    In-memory store for outputs of tests which are used by later tests of the same TestSet (see the
+    `outputs` / `inputs` of a test), e.g. the amplitude conversion measured by SignalGen2LAB4D.
+
+    An artifact is identified by its name, the board (dut uid) and further keys (e.g. the channel
+    and the waveform). Publishing the same artifact again replaces the previous value.
+    """
+
+    def __init__(self):
+        self._artifacts = dict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, dut_uid, keys):
+        return name, dut_uid, frozenset(keys.items())
+
+    def publish(self, name, dut_uid, value, **keys):
+        with self._lock:
+            self._artifacts[self._key(name, dut_uid, keys)] = value
+
+    def get(self, name, dut_uid, default=None, **keys):
+        with self._lock:
+            return self._artifacts.get(self._key(name, dut_uid, keys), default)
+
+    def __len__(self):
+        return len(self._artifacts)
@@ -0,0 +1,46 @@
+import asyncio
+import concurrent.futures
+
+from .timing import current_span, span
+
+
+def _run_step(name, func, parent):
+    # The step runs in a thread of the executor, its timing spans are added to the span of the caller
+    with span(name, parent=parent):
+        return func()
+
+
+async def gather_steps(steps, executor=None, parent=None):
+    """
+    Coroutine which runs the blocking callables `steps` (dict name -> callable without arguments,
+    e.g. a lambda or `functools.partial`) concurrently in `executor` (default: the executor of the
+    event loop) and returns their results as dict. Each step is recorded as span `name` (child of
+    `parent`). Raises the first exception of a step.
+    """
+    loop = asyncio.get_running_loop()
+    names = list(steps)
+    results = await asyncio.gather(
+        *[loop.run_in_executor(executor, _run_step, name, steps[name], parent) for name in names])
+    return dict(zip(names, results))
+
+
+def run_concurrently(sequential=False, **steps):
+    """
+    Run independent blocking steps of a test (calls to the station, the signal generator, the
+    Arduino, ...) concurrently and wait for all of them, e.g.
+
+        run_concurrently(
+            awg=lambda: self.awg.set_arb_waveform_amplitude_couple(...),
+            station=lambda: self.device.set_run_conf(run_conf))
+        daq_run = self.start_run(None)
+
+    Returns the results as dict (name -> result). If a step fails, the others are still finished
+    before its exception is raised. With `sequential=True` the steps run one after the other in the
+    current thread (in the given order).
+    """
+    parent = current_span()
+    if sequential or len(steps) < 2:
+        return {name: _run_step(name, func, parent) for name, func in steps.items()}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="step") as executor:
+        return asyncio.run(gather_steps(steps, executor, parent))
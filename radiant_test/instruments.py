@@ -0,0 +1,82 @@
+import atexit
+import logging
+import threading
+import time
+
+
+class InstrumentPool(object):
+    """
+    Process-wide pool of the bench instruments (signal generator, Arduino). An instrument is only
+    connected when a test uses it for the first time and the connection is reused by all following
+    tests (also of other TestSets). Before a connection is handed out again (at most every
+    `check_interval` seconds) its health check is run, if it fails the instrument is reconnected.
+    All connections are closed at exit.
+    """
+
+    def __init__(self, check_interval=30):
+        self.check_interval = check_interval
+        self._instruments = dict()
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger("InstrumentPool")
+        atexit.register(self.close_all)
+
+    def get(self, key, connect, check=None, close=None):
+        """
+        Returns the instrument `key`, `connect()` creates it. `check(instrument)` raises or returns
+        False if the connection is broken, `close(instrument)` closes it.
+        """
+        with self._lock:
+            entry = self._instruments.get(key)
+            if entry is not None and check is not None and time.time() - entry["checked"] > self.check_interval:
+                try:
+                    healthy = check(entry["instrument"]) is not False
+                except Exception as e:
+                    self.logger.warning(f"Health check of {key} failed: {e}")
+                    healthy = False
+
+                if healthy:
+                    entry["checked"] = time.time()
+                else:
+                    self.logger.warning(f"Reconnect {key}")
+                    self.close(key)
+                    entry = None
+
+            if entry is None:
+                self.logger.info(f"Connect {key}")
+                entry = {"instrument": connect(), "close": close, "checked": time.time()}
+                self._instruments[key] = entry
+
+            return entry["instrument"]
+
+    def close(self, key):
+        with self._lock:
+            entry = self._instruments.pop(key, None)
+        if entry is None or entry["close"] is None:
+            return
+        try:
+            entry["close"](entry["instrument"])
+        except Exception as e:
+            self.logger.warning(f"Could not close {key}: {e}")
+
+    def close_all(self):
+        with self._lock:
+            keys = list(self._instruments)
+        for key in keys:
+            self.close(key)
+
+
+pool = InstrumentPool()
+
+
+def get_awg(ip_address):
+    """ Returns the (shared) Keysight81160A signal generator at `ip_address` """
+    from .Keysight81160A import Keysight81160A
+    return pool.get(("Keysight81160A", ip_address), lambda: Keysight81160A(ip_address),
+                    check=lambda awg: awg.get_id(), close=lambda awg: awg.close())
+
+
+def get_arduino():
+    """ Returns the (shared) ArduinoNano which routes the signal to the RADIANT channels """
+    from .ArduinoNano import ArduinoNano
+    return pool.get("ArduinoNano", ArduinoNano,
+                    check=lambda arduino: arduino.dev.is_open, close=lambda arduino: arduino.close_serial_port())
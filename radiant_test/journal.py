@@ -0,0 +1,65 @@
+import json
+import pathlib
+import threading
+
+from .util import ResultEncoder
+
+
+class MeasurementJournal(object):
+    """
+    Append-only file (JSON Lines) which holds the measurements of a test while it is running.
+
+    The first line contains the (meta) data of the result dict known when the journal was created,
+    every further line one measurement. The file is written measurement by measurement, hence a
+    crash only loses the measurement which was in progress.
+    """
+    suffix = ".journal.jsonl"
+
+    def __init__(self, fname, header):
+        self.fname = pathlib.Path(fname)
+        self.fname.parent.mkdir(parents=True, exist_ok=True)
+
+        # byte offset of the (latest) line of each measurement
+        self._offsets = dict()
+        self._lock = threading.Lock()
+
+        with open(self.fname, "wb") as f:
+            f.write(self._encode({"header": header}))
+
+    @staticmethod
+    def _encode(obj):
+        return (json.dumps(obj, cls=ResultEncoder) + "\n").encode()
+
+    def append(self, name, value, result):
+        line = self._encode({"name": name, "measured_value": value, "result": result})
+        with self._lock, open(self.fname, "ab") as f:
+            self._offsets[name] = f.tell()
+            f.write(line)
+
+    def read(self, name):
+        """ Returns the entry of a measurement (dict with "measured_value" and "result") """
+        with self._lock, open(self.fname, "rb") as f:
+            f.seek(self._offsets[name])
+            entry = json.loads(f.readline())
+
+        del entry["name"]
+        return entry
+
+    def remove(self):
+        self.fname.unlink()
+
+    @staticmethod
+    def load(fname):
+        """ Read a journal, e.g. after a crash. Returns the header and all measurements. """
+        measurements = dict()
+        with open(fname, "rb") as f:
+            header = json.loads(f.readline())["header"]
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line might be incomplete
+                    break
+                measurements[entry.pop("name")] = entry
+
+        return header, measurements
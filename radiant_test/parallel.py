@@ -0,0 +1,76 @@
+import contextlib
+import logging
+import multiprocessing
+import threading
+
+
+# Shared bench equipment (signal generator, RF switch) which can only serve one station at a time
+BENCH_RESOURCES = ["awg", "arduino"]
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def register_locks(locks):
+    """ Register (process-shared) locks, e.g. the ones handed to a worker process by `run_parallel` """
+    with _locks_guard:
+        _locks.update(locks)
+
+
+def get_lock(name):
+    """ Returns the lock for a resource. Locks which were not registered are created per process. """
+    with _locks_guard:
+        if name not in _locks:
+            _locks[name] = threading.Lock()
+        return _locks[name]
+
+
+@contextlib.contextmanager
+def resource_lock(*names):
+    """ Acquire the locks of all resources in `names` (in a fixed order to avoid dead locks) """
+    with contextlib.ExitStack() as stack:
+        for name in sorted(set(names)):
+            lock = get_lock(name)
+            if not lock.acquire(False):
+                logging.info(f"Waiting for {name} to become available ...")
+                lock.acquire()
+            stack.callback(lock.release)
+        yield
+
+
+def _worker(target, host, locks, args):
+    register_locks(locks)
+    target(host, *args)
+
+
+def run_parallel(target, hosts, *args):
+    """
+    Run `target(host, *args)` in one process per host. The bench resources are arbitrated
+    between the processes with locks (see `resource_lock`).
+
+    The workers are forked (also where "spawn" is the default start method, e.g. macOS), because
+    `target` is usually defined in the script which is executed (`__main__`, e.g. `run_set.py`). A
+    spawned process would have to import it and thereby run the script again. Hence this only works
+    on platforms which support "fork" (not on Windows).
+
+    Returns the list of hosts for which the worker process failed.
+    """
+    context = multiprocessing.get_context("fork")
+    locks = {name: context.Lock() for name in BENCH_RESOURCES}
+
+    processes = [
+        context.Process(target=_worker, args=(target, host, locks, args), name=f"radiant-{host}")
+        for host in hosts
+    ]
+
+    for process in processes:
+        process.start()
+
+    failed = []
+    for host, process in zip(hosts, processes):
+        process.join()
+        if process.exitcode != 0:
+            logging.error(f"Worker for host {host} failed with exit code {process.exitcode}")
+            failed.append(host)
+
+    return failed
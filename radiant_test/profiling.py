@@ -0,0 +1,78 @@
+import cProfile
+import contextlib
+import logging
+import tracemalloc
+
+
+class TestProfiler(object):
+    """
+    Profiles the phases of a test with cProfile and traces their memory allocations with
+    tracemalloc. `write` stores the profile (`<result file>.pstats`, e.g. for `snakeviz` or
+    `python -m pstats`) and a summary of the memory usage (`<result file>.memory.txt`).
+
+    cProfile only profiles the thread which runs the phase and tracemalloc traces the whole
+    process, hence tests should not run concurrently while they are profiled.
+    """
+
+    def __init__(self, test, n_top=10):
+        self.test = test
+        self.n_top = n_top
+        self.profile = cProfile.Profile()
+        self.memory = []
+        self._started_tracing = False
+        self.logger = logging.getLogger(f"{test.name}.profile")
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        # Before Python 3.9 the peak is the one since tracing started
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+
+            end, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)])
+
+            self.memory.append({
+                "phase": name, "start": start, "end": end, "peak": peak,
+                "top": snapshot.statistics("lineno")[:self.n_top],
+            })
+
+    def get_memory_summary(self):
+        lines = [f"Memory usage of {self.test.name} (allocations traced by tracemalloc)"]
+        for memory in self.memory:
+            lines.append("")
+            lines.append(
+                f"{memory['phase']}: peak {memory['peak'] / 1024 ** 2:.1f} MiB, "
+                f"{memory['start'] / 1024 ** 2:.1f} MiB -> {memory['end'] / 1024 ** 2:.1f} MiB allocated")
+            lines.append(f"  Top {self.n_top} allocations still held at the end of {memory['phase']}:")
+            for stat in memory["top"]:
+                lines.append(f"    {stat.size / 1024 ** 2:8.2f} MiB in {stat.count:7d} blocks  {stat.traceback}")
+        return "\n".join(lines) + "\n"
+
+    def stop(self):
+        """ Stop tracing the memory allocations (if this profiler started it) """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def write(self, fname=None):
+        """ Store the profile and the memory summary next to the result file (or `fname`) """
+        if fname is None:
+            fname = self.test.fname
+
+        self.profile.dump_stats(fname.with_suffix(".pstats"))
+        with open(fname.with_suffix(".memory.txt"), "w") as f:
+            f.write(self.get_memory_summary())
+
+        self.logger.info(f"Stored profile in {fname.with_suffix('.pstats')} and memory summary in "
+                         f"{fname.with_suffix('.memory.txt')}")
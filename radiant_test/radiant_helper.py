@@ -1,5 +1,11 @@
+import re
+
 import stationrc.remote_control
 
+from .station_cache import CachedStation
+from .station_shadow import ShadowedStation
+from .timing import TimedProxy
+
 
 RADIANT_NUM_CHANNELS = 24
 RADIANT_NUM_QUADS = 3
@@ -46,13 +52,61 @@ def quad_for_channel(channel_id):
         raise ValueError("Invalid channel id!")
 
 
-def get_radiant(host=None):
+def get_radiant(host=None, simulate=False):
+    """
+    Returns the station `host`. With `simulate`, returns a simulated station with synthetic data
+    (radiant_test.SimulatedStation) to run the tests without hardware.
+    """
     global RADIANTs
 
-    if host not in RADIANTs:
-        RADIANTs[host] = stationrc.remote_control.VirtualStation(host=host)
+    key = ("simulated", host) if simulate else host
+    if key not in RADIANTs:
+        if simulate:
+            from .SimulatedStation import SimulatedStation
+            station = SimulatedStation(host=host)
+        else:
+            station = stationrc.remote_control.VirtualStation(host=host)
+
+        # Every call to the station is recorded as timing span of the running test, the identity of
+        # the board is only read once per session and commands which do not change the state are skipped
+        RADIANTs[key] = CachedStation(ShadowedStation(TimedProxy(station, "station")))
+
+    return RADIANTs[key]
+
+
+def is_simulated(station):
+    return getattr(station, "simulated", False)
+
+
+def create_run(station):
+    """ Returns a new `stationrc.remote_control.Run` for the station (or its simulated counterpart) """
+    if is_simulated(station):
+        from .SimulatedStation import SimulatedRun
+        return SimulatedRun(station)
+    return stationrc.remote_control.Run(station)
+
+
+class _CombinedTree(object):
+    """
+    The simulated station can not write fixed size arrays under the branch names of mattak (uproot
+    appends the dimensions to the name again), it stores e.g. "waveforms/radiant_data[24][2048]" as
+    "waveforms/radiant_data".
+    """
+
+    def __init__(self, tree):
+        self._tree = tree
+
+    def __getitem__(self, name):
+        try:
+            return self._tree[name]
+        except KeyError:
+            return self._tree[re.sub(r"(\[\d+\])+$", "", name)]
+
 
-    return RADIANTs[host]
+def open_combined(root_file):
+    """ Returns the tree "combined" of a `combined.root` file (converted by mattak or written by the simulated station) """
+    import uproot
+    return _CombinedTree(uproot.open(root_file)["combined"])
 
 
 def uid_to_name(uid):
@@ -0,0 +1,183 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+
+from .radiant_helper import uid_to_name
+
+
+class ResultIndex(object):
+    """
+    SQLite index of all result files below a results directory (default: `results/`).
+
+    `Test._save_result` adds every new result file, `rebuild` (see `scripts/rebuild_result_index.py`)
+    indexes an existing results directory. Result files which were copied into the directory later
+    are indexed by `update`, which `query` runs if nothing matches. Paths are stored relative to the
+    results directory.
+    """
+    fname = "index.sqlite"
+
+    columns = ["path", "directory", "dut_uid", "dut_name", "test_name", "base_test", "timestamp",
+               "sample_rate", "result", "config_hash", "config"]
+
+    def __init__(self, root="results"):
+        self.root = pathlib.Path.cwd() / root
+        self.db_fname = self.root / self.fname
+        self.logger = logging.getLogger("ResultIndex")
+
+        if not self.db_fname.exists() and self.root.is_dir():
+            self.rebuild()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        # One short-lived connection per operation: the index is written from several threads and processes
+        with contextlib.closing(sqlite3.connect(self.db_fname, timeout=60)) as con:
+            con.row_factory = sqlite3.Row
+            with con:
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "path TEXT PRIMARY KEY, directory TEXT, dut_uid TEXT, dut_name TEXT, test_name TEXT, "
+                    "base_test TEXT, timestamp REAL, sample_rate INTEGER, result TEXT, config_hash TEXT, "
+                    "config TEXT)")
+                con.execute("CREATE INDEX IF NOT EXISTS results_dut_test ON results (dut_name, base_test)")
+                yield con
+
+    def _relpath(self, path):
+        return pathlib.Path(os.path.relpath(pathlib.Path.cwd() / path, self.root)).as_posix()
+
+    @staticmethod
+    def config_hash(config):
+        return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+    def _get_row(self, fname, result_dict, base_test=None):
+        config = result_dict.get("config")
+        path = self._relpath(fname)
+        return {
+            "path": path,
+            "directory": pathlib.PurePosixPath(path).parent.as_posix(),
+            "dut_uid": result_dict["dut_uid"],
+            "dut_name": uid_to_name(result_dict["dut_uid"]),
+            "test_name": result_dict["test_name"],
+            # Older result files do not store the base test, for tests renamed in a test set it is only known when saving
+            "base_test": base_test or result_dict.get("basename") or result_dict["test_name"],
+            "timestamp": result_dict["initialize"]["timestamp"],
+            "sample_rate": result_dict.get("radiant_sample_rate"),
+            "result": result_dict.get("result"),
+            "config_hash": None if config is None else self.config_hash(config),
+            "config": None if config is None else json.dumps(config),
+        }
+
+    def _insert(self, con, rows):
+        con.executemany(
+            f"INSERT OR REPLACE INTO results ({', '.join(self.columns)}) "
+            f"VALUES ({', '.join(':' + column for column in self.columns)})", rows)
+
+    def add(self, fname, result_dict, base_test=None):
+        """ Add (or update) the result file `fname` with the content `result_dict` """
+        with self._connect() as con:
+            self._insert(con, [self._get_row(fname, result_dict, base_test)])
+
+    def _read_rows(self, fnames):
+        rows = []
+        for fname in fnames:
+            try:
+                with open(fname, "r") as f:
+                    result_dict = json.load(f)
+                rows.append(self._get_row(fname, result_dict))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.logger.warning(f"Could not index {fname}: {e}")
+        return rows
+
+    def rebuild(self):
+        """ Index all result files in the results directory (and its subdirectories) from scratch """
+        rows = self._read_rows(sorted(self.root.rglob("*.json")))
+
+        with self._connect() as con:
+            con.execute("DELETE FROM results")
+            self._insert(con, rows)
+
+        self.logger.info(f"Indexed {len(rows)} result files in {self.root}")
+        return len(rows)
+
+    def update(self, directory=None):
+        """
+        Index the result files in `directory` (default: the results directory) and its
+        subdirectories which are not in the index yet. Returns the number of added files.
+        """
+        search_dir = self.root if directory is None else pathlib.Path.cwd() / directory
+        if not search_dir.is_dir():
+            return 0
+
+        with self._connect() as con:
+            indexed = {row["path"] for row in con.execute("SELECT path FROM results")}
+
+        rows = self._read_rows(sorted(
+            fname for fname in search_dir.rglob("*.json") if self._relpath(fname) not in indexed))
+        if rows:
+            with self._connect() as con:
+                self._insert(con, rows)
+            self.logger.info(f"Indexed {len(rows)} new result files in {search_dir}")
+        return len(rows)
+
+    def query(self, directory=None, limit=None, **kwargs):
+        """
+        Returns the indexed results (newest first) as dicts with the columns of the index, `path`
+        is returned as path relative to the current working directory and `config` as dict.
+
+        Filter by any column, e.g. `query(dut_name="ULB-014", base_test="SignalGen2LAB4D")`. A list
+        of values matches any of them. `directory` (relative to the current working directory)
+        only returns result files located directly in this directory.
+        Result files which do no longer exist are skipped. If nothing matches, the result files
+        which are not indexed yet are added (see `update`) and the query is repeated.
+        """
+        entries = self._query(directory, limit, **kwargs)
+        if not entries and self.update(directory):
+            entries = self._query(directory, limit, **kwargs)
+        return entries
+
+    def _query(self, directory=None, limit=None, **kwargs):
+        conditions = []
+        values = []
+        if directory is not None:
+            kwargs["directory"] = self._relpath(directory)
+
+        for column, value in kwargs.items():
+            if column not in self.columns:
+                raise ValueError(f"Unknown column {column}")
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(f"{column} IN ({', '.join('?' * len(value))})")
+                values.extend(value)
+            else:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+
+        sql = "SELECT * FROM results"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY timestamp DESC"
+
+        with self._connect() as con:
+            rows = con.execute(sql, values).fetchall()
+
+        entries = []
+        for row in rows:
+            entry = dict(row)
+            entry["path"] = pathlib.Path(os.path.relpath(self.root / entry["path"]))
+            if not entry["path"].exists():
+                continue
+            if entry["config"] is not None:
+                entry["config"] = json.loads(entry["config"])
+            entries.append(entry)
+            if limit is not None and len(entries) >= limit:
+                break
+
+        return entries
+
+    def find_newest(self, **kwargs):
+        """ Returns the path of the newest result file matching the query (see `query`) or None """
+        entries = self.query(limit=1, **kwargs)
+        return entries[0]["path"] if entries else None
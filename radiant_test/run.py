@@ -1,15 +1,30 @@
 from .RADIANTTest import RADIANTTest
+from .parallel import resource_lock
 from .radiant_helper import get_radiant
 
 
-def run(test_class, kwargs={}, host=None):
+def run(test_class, kwargs={}, host=None, profile=False, simulate=False):
     test = test_class(**kwargs)
 
     if issubclass(test_class, RADIANTTest):
-        test.device = get_radiant(host)
+        test.device = get_radiant(host, simulate=simulate)
 
-    test.initialize()
-    test.run()
-    test.finalize()
+    if profile:
+        test.enable_profiling()
+
+    try:
+        with resource_lock(*test.resources):
+            with test.phase("initialize"):
+                test.initialize()
+            with test.phase("run"):
+                test.run()
+            with test.phase("finalize"):
+                test.finalize()
+
+        if test.profiler is not None:
+            test.profiler.write()
+    finally:
+        if test.profiler is not None:
+            test.profiler.stop()
 
     return test
@@ -0,0 +1,79 @@
+import threading
+
+
+# Registers which identify the firmware of the board manager and the FPGA, they only change when the board is reset
+IDENTITY_REGISTERS = ["BM_ID", "BM_DATEVERSION", "FPGA_ID", "FPGA_DATEVERSION"]
+
+
+class _CachedLowLevelInterface(object):
+
+    def __init__(self, station):
+        self._station = station
+
+    def __getattr__(self, attr):
+        return getattr(self._station._station.radiant_low_level_interface, attr)
+
+    def read_register(self, name):
+        if name not in IDENTITY_REGISTERS:
+            return self._station._station.radiant_low_level_interface.read_register(name)
+        return self._station._get(
+            name, self._station._station.radiant_low_level_interface.read_register, name)
+
+    def refresh_registers(self, names):
+        """
+        Reads the registers from the board (bypassing the cache, one call per register), updates the
+        cached identity registers and returns the values as dict
+        """
+        interface = self._station._station.radiant_low_level_interface
+        values = {name: interface.read_register(name) for name in names}
+        self._station._update({name: value for name, value in values.items() if name in IDENTITY_REGISTERS})
+        return values
+
+
+class CachedStation(object):
+    """
+    Wraps the station and caches the identity of the RADIANT for the session: MCU uid, DNA, revision,
+    sample rate and the id / date-version registers of board manager and FPGA (see
+    `IDENTITY_REGISTERS`). Every test reads them in `initialize`, with the cache only the first one
+    talks to the board.
+
+    The cache is cleared by `reset_radiant_board` and `invalidate_board_identity` (called at the start
+    of every TestSet). All other calls are passed on to the station.
+    """
+    cached_methods = ["get_radiant_board_mcu_uid", "get_radiant_board_dna", "radiant_revision",
+                      "radiant_sample_rate"]
+
+    def __init__(self, station):
+        object.__setattr__(self, "_station", station)
+        object.__setattr__(self, "_cache", dict())
+        object.__setattr__(self, "_lock", threading.RLock())
+        object.__setattr__(self, "radiant_low_level_interface", _CachedLowLevelInterface(self))
+
+    def _get(self, key, func, *args):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = func(*args)
+            return self._cache[key]
+
+    def _update(self, values):
+        with self._lock:
+            self._cache.update(values)
+
+    def __getattr__(self, attr):
+        value = getattr(self._station, attr)
+        if attr in self.cached_methods:
+            return lambda: self._get(attr, value)
+        return value
+
+    def __setattr__(self, attr, value):
+        setattr(self._station, attr, value)
+
+    def invalidate_board_identity(self):
+        with self._lock:
+            self._cache.clear()
+
+    def reset_radiant_board(self, *args, **kwargs):
+        try:
+            return self._station.reset_radiant_board(*args, **kwargs)
+        finally:
+            self.invalidate_board_identity()
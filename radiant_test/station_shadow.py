@@ -0,0 +1,141 @@
+import collections
+import functools
+import json
+import logging
+import threading
+
+
+_UNKNOWN = object()
+
+# Calls which do not change the configuration of the board
+QUERY_PREFIXES = ("get_", "read_", "board_manager_", "daq_record_data", "daq_run_wait", "retrieve_data",
+                  "radiant_pedestal_get", "radiant_revision", "radiant_sample_rate")
+
+# Commands which change the board, but none of the shadowed state (runs and pedestals)
+STATE_PRESERVING_PREFIXES = ("daq_run_", "radiant_pedestal_")
+
+
+def _preserves_state(name):
+    return name.startswith(QUERY_PREFIXES + STATE_PRESERVING_PREFIXES)
+
+
+class _ShadowedLowLevelInterface(object):
+
+    def __init__(self, station):
+        self._station = station
+
+    def __getattr__(self, attr):
+        value = getattr(self._station._station.radiant_low_level_interface, attr)
+        if callable(value) and not _preserves_state(attr):
+            return self._station._modifying(value)
+        return value
+
+    def calibration_load(self):
+        return self._station._set("calibration_loaded", True, "calibration_load",
+                                  self._station._station.radiant_low_level_interface.calibration_load)
+
+
+class ShadowedStation(object):
+    """
+    Wraps the station and keeps a shadow of the state it was configured to: the internal signal
+    generator (on/off, configuration, frequency), the calibration switch (`radiant_calselect`),
+    the surface amplifiers, the run configuration and whether the calibration was loaded
+    (`calibration_load`). Commands which would not change the state are skipped (and logged), e.g.
+    `radiant_calselect(quad=None)` at the end of one test and the start of the next one, or
+    `set_run_conf` of the next test if its run configuration is the same.
+
+    A shadowed command only changes its own part of the state. Queries and the commands in
+    `STATE_PRESERVING_PREFIXES` (e.g. `daq_run_start`) do not change it. Any other command may
+    change the board in a way which is not shadowed, once it was called the whole state is
+    forgotten. `reset_radiant_board` is never skipped, afterwards only the calibration is known
+    to be loaded (the reset loads it).
+    """
+
+    def __init__(self, station):
+        object.__setattr__(self, "_station", station)
+        object.__setattr__(self, "_state", dict())
+        object.__setattr__(self, "_lock", threading.RLock())
+        object.__setattr__(self, "logger", logging.getLogger("ShadowedStation"))
+        object.__setattr__(self, "skipped", collections.Counter())
+        object.__setattr__(self, "radiant_low_level_interface", _ShadowedLowLevelInterface(self))
+
+    def __getattr__(self, attr):
+        value = getattr(self._station, attr)
+        if callable(value) and not _preserves_state(attr):
+            return self._modifying(value)
+        return value
+
+    def __setattr__(self, attr, value):
+        setattr(self._station, attr, value)
+
+    def _modified(self):
+        with self._lock:
+            self._state.clear()
+
+    def _modifying(self, func):
+        """ Wraps the command `func`, which is not shadowed, to forget the state once it is called """
+        @functools.wraps(func)
+        def command(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._modified()
+
+        return command
+
+    def _set(self, key, value, name, func, *args, **kwargs):
+        """ Calls `func` unless the shadowed state `key` already is `value` """
+        with self._lock:
+            if self._state.get(key, _UNKNOWN) == value:
+                self.skipped[name] += 1
+                self.logger.info(f"Skip {name}: station already in this state ({key} = {value!r})")
+                return None
+
+            self._state.pop(key, None)
+            result = func(*args, **kwargs)
+            self._state[key] = value
+            return result
+
+    def invalidate_state(self):
+        """ Forget the shadowed state, e.g. after the board was power cycled outside of the tests """
+        with self._lock:
+            self._state.clear()
+
+    def reset_radiant_board(self):
+        with self._lock:
+            self._state.clear()
+            result = self._station.reset_radiant_board()
+            self._state["calibration_loaded"] = True
+            return result
+
+    def radiant_sig_gen_on(self):
+        return self._set("sig_gen", True, "radiant_sig_gen_on", self._station.radiant_sig_gen_on)
+
+    def radiant_sig_gen_off(self):
+        return self._set("sig_gen", False, "radiant_sig_gen_off", self._station.radiant_sig_gen_off)
+
+    def radiant_sig_gen_configure(self, pulse=False, band=0):
+        return self._set("sig_gen_config", (pulse, band), "radiant_sig_gen_configure",
+                         self._station.radiant_sig_gen_configure, pulse=pulse, band=band)
+
+    def radiant_sig_gen_set_frequency(self, frequency):
+        return self._set("sig_gen_frequency", frequency, "radiant_sig_gen_set_frequency",
+                         self._station.radiant_sig_gen_set_frequency, frequency=frequency)
+
+    def radiant_calselect(self, quad=None):
+        return self._set("calselect", quad, "radiant_calselect", self._station.radiant_calselect, quad=quad)
+
+    def surface_amps_power_on(self):
+        return self._set("surface_amps", True, "surface_amps_power_on", self._station.surface_amps_power_on)
+
+    def surface_amps_power_off(self):
+        return self._set("surface_amps", False, "surface_amps_power_off", self._station.surface_amps_power_off)
+
+    def set_run_conf(self, run_conf):
+        # stationrc can only send the run configuration as a whole, it is skipped if no field changed
+        try:
+            fields = json.dumps(vars(run_conf), sort_keys=True, default=repr)
+        except (TypeError, ValueError):
+            fields = object()  # never equal to the shadowed state
+
+        return self._set("run_conf", fields, "set_run_conf", self._station.set_run_conf, run_conf)
@@ -0,0 +1,142 @@
+import functools
+import threading
+import time
+
+
+_local = threading.local()
+
+
+class Span(object):
+    """
+    Timing of a section of code (e.g. a phase of a test or a call to an instrument) with the
+    timings of the sections nested in it. Used as context manager; while it is active, spans
+    opened in the same thread (see `span`) are added as children.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+        self.end = None
+        self.children = []
+
+    def __enter__(self):
+        self.start = time.time()
+        _get_stack().append(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.end = time.time()
+        stack = _get_stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        else:
+            stack.remove(self)
+        return False
+
+    def child(self, name):
+        span = Span(name)
+        self.children.append(span)
+        return span
+
+    def get_interval(self):
+        """
+        Returns start and end time. For a span which is still active the end is the current time,
+        for a span which was never entered (e.g. the span of a test, which only groups the spans of
+        its phases) the interval covered by its children.
+        """
+        if self.start is not None:
+            return self.start, time.time() if self.end is None else self.end
+
+        intervals = [child.get_interval() for child in self.children]
+        intervals = [interval for interval in intervals if interval[0] is not None]
+        if not intervals:
+            return None, None
+        return min(start for start, _ in intervals), max(end for _, end in intervals)
+
+    @property
+    def duration(self):
+        start, end = self.get_interval()
+        return None if start is None else end - start
+
+    def to_dict(self):
+        start, end = self.get_interval()
+        dic = {"name": self.name, "start": start, "duration": None if start is None else end - start}
+        if self.children:
+            dic["children"] = [child.to_dict() for child in self.children]
+        return dic
+
+
+class _NoSpan(object):
+    """ Returned by `span` if no timing is recorded """
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _get_stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span():
+    """ Returns the innermost active span of the current thread or None """
+    stack = _get_stack()
+    return stack[-1] if stack else None
+
+
+def span(name, parent=None):
+    """
+    Context manager which records the section as child of `parent` (default: the innermost active
+    span of the current thread). Does nothing if there is no parent, i.e., outside of a test.
+    Pass `parent` explicitly to record sections running in another thread.
+    """
+    if parent is None:
+        parent = current_span()
+    if parent is None:
+        return _NoSpan()
+    return parent.child(name)
+
+
+def timed(func):
+    """ Decorator which records every call of a method as span named `<class>.<method>` """
+    @functools.wraps(func)
+    def inner(self, *args, **kwargs):
+        with span(f"{self.__class__.__name__}.{func.__name__}"):
+            return func(self, *args, **kwargs)
+
+    return inner
+
+
+class TimedProxy(object):
+    """
+    Wraps an object (e.g. the station) such that every method call is recorded as span. Attributes
+    holding objects of the same package (e.g. `radiant_low_level_interface`) are wrapped as well.
+    """
+
+    def __init__(self, obj, name=None):
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_name", name or obj.__class__.__name__)
+
+    def __getattr__(self, attr):
+        value = getattr(self._obj, attr)
+        name = f"{self._name}.{attr}"
+
+        if callable(value) and not isinstance(value, type):
+            @functools.wraps(value)
+            def inner(*args, **kwargs):
+                with span(name):
+                    return value(*args, **kwargs)
+            return inner
+
+        package = self._obj.__class__.__module__.split(".")[0]
+        if value.__class__.__module__.split(".")[0] == package:
+            return TimedProxy(value, name)
+
+        return value
+
+    def __setattr__(self, attr, value):
+        setattr(self._obj, attr, value)
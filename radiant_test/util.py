@@ -1,20 +1,34 @@
 import datetime
+import enum
+import json
 import sys
 
+import numpy as np
+
 
 def get_timestamp():
     return datetime.datetime.now().timestamp()
 
-def make_serializable(obj):
-    if isinstance(obj, dict):
-        return {key: make_serializable(value) for key, value in obj.items()}
-    elif isinstance(obj, (list, tuple)):
-        return [make_serializable(item) for item in obj]
-    elif isinstance(obj, set):
-        return [make_serializable(item) for item in list(obj)]
-    elif isinstance(obj, (int, float, str, bool, type(None))):
-        return obj
-    else:
+class ResultEncoder(json.JSONEncoder):
+    """
+    JSON encoder for result dicts. Encodes numpy arrays and scalars, enums (by name), sets and paths
+    while serializing, i.e., without converting the result dict first. Other objects are stored as
+    their string representation.
+
+    Numpy arrays are still converted to a temporary python list (`tolist`). This is only cheap for
+    small arrays: measured values with at least `arrays.LARGE_ARRAY_SIZE` elements are moved to
+    binary sidecar files by `Test.add_measurement` before they are encoded.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        elif isinstance(obj, np.generic):
+            return obj.item()
+        elif isinstance(obj, enum.Enum):
+            return obj.name
+        elif isinstance(obj, (set, frozenset)):
+            return list(obj)
         return str(obj)
 
 def check_param(param_value, param_min, param_max):
@@ -8,12 +8,51 @@ parser = argparse.ArgumentParser()
 parser.add_argument("test_set", type=str, help="test set to execute")
 parser.add_argument("--comment", type=str, help="add a comment to the result dict of every test")
 parser.add_argument("--debug", action="store_true", help="Set logger setting to DEBUG")
+parser.add_argument("--sequential", action="store_true",
+                    help="Run the tests strictly in the order of the set (no concurrent analysis tests)")
+parser.add_argument("--host", "--hosts", dest="hosts", type=str, default=[None], nargs="+",
+                    help="Specify ip address of host. If `None`, use ip from config in stationrc.")
+parser.add_argument("--parallel", action="store_true",
+                    help="Run the test set for all hosts in parallel (one process per host). Shared bench equipment is locked.")
+parser.add_argument("--resume", type=str, default=None, metavar="RESULT_DIR",
+                    help="Continue an interrupted test set in its result directory (skips tests with a stored result)")
+parser.add_argument("--rerun-failed", dest="rerun_failed", type=str, default=None, metavar="RESULT_DIR",
+                    help="Rerun all tests of a set which did not pass and store the results in the same directory")
+parser.add_argument("--profile", action="store_true",
+                    help="Profile each test (cProfile and tracemalloc), stored next to the result files. Implies --sequential.")
+parser.add_argument("--simulate", action="store_true",
+                    help="Run against a simulated station with synthetic data (no RADIANT needed)")
 args = parser.parse_args()
 
+if args.resume is not None and args.rerun_failed is not None:
+    parser.error("--resume and --rerun-failed can not be used together")
+
+result_dir = args.resume if args.resume is not None else args.rerun_failed
+if result_dir is not None and len(args.hosts) > 1:
+    parser.error("--resume and --rerun-failed only work for a single host")
+
+log_format = "%(processName)s:%(levelname)s:%(name)s:%(message)s" if args.parallel else logging.BASIC_FORMAT
 if args.debug:
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(level=logging.DEBUG, format=log_format)
 else:
-    logging.basicConfig(level=logging.INFO)
+    logging.basicConfig(level=logging.INFO, format=log_format)
+
 
-test_set = radiant_test.TestSet(args.test_set, device=radiant_test.get_radiant(), comment=args.comment)
-test_set.run()
+def run(host, args):
+    # Only tag the result directory with the host if several boards are tested
+    tag = host if len(args.hosts) > 1 else None
+    test_set = radiant_test.TestSet(
+        args.test_set, device=radiant_test.get_radiant(host, simulate=args.simulate), comment=args.comment, tag=tag,
+        result_dir=result_dir)
+    if result_dir is not None:
+        test_set.skip_finished(rerun_failed=args.rerun_failed is not None)
+    test_set.run(sequential=args.sequential, profile=args.profile)
+
+
+if args.parallel:
+    failed = radiant_test.run_parallel(run, args.hosts, args)
+    if failed:
+        raise SystemExit(f"Test set failed for host(s): {failed}")
+else:
+    for host in args.hosts:
+        run(host, args)
@@ -3,11 +3,12 @@ import logging
 import time
 import radiant_test
 
-def run(args, host):
+def run(host, args):
     for test in args.tests:
         test_class = getattr(module, test)
         t0 = time.time()
-        test_obj = radiant_test.run(test_class, {"comment": args.comment}, host=host)
+        test_obj = radiant_test.run(test_class, {"comment": args.comment}, host=host, profile=args.profile,
+                                     simulate=args.simulate)
         logging.info(f"Test {test} finished in {time.time() - t0:.2f} s")
         if args.plot:
             scripts = __import__("scripts")
@@ -28,18 +29,26 @@ parser.add_argument("--comment", type=str, default=None, help="add a comment to
 parser.add_argument("--host", "--hosts", dest="hosts", type=str, default=[None], nargs="+",
                     help="Specify ip address of host. If `None`, use ip from config in stationrc.")
 parser.add_argument("--debug", action="store_true", help="Set logger setting to DEBUG")
-parser.add_argument("--parallel", action="store_true", help="Set logger setting to DEBUG")
+parser.add_argument("--parallel", action="store_true",
+                    help="Test all hosts in parallel (one process per host). Shared bench equipment is locked.")
 parser.add_argument("--plot", action="store_true", help="Run the plotting script (if available)")
+parser.add_argument("--profile", action="store_true",
+                    help="Profile each test (cProfile and tracemalloc), stored next to the result file")
+parser.add_argument("--simulate", action="store_true",
+                    help="Run against a simulated station with synthetic data (no RADIANT needed)")
 args = parser.parse_args()
 
+log_format = "%(processName)s:%(levelname)s:%(name)s:%(message)s" if args.parallel else logging.BASIC_FORMAT
 if args.debug:
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(level=logging.DEBUG, format=log_format)
 else:
-    logging.basicConfig(level=logging.INFO)
+    logging.basicConfig(level=logging.INFO, format=log_format)
 
 if args.parallel:
-    raise NotImplementedError("Parallel mode is not yet implemented")
+    failed = radiant_test.run_parallel(run, args.hosts, args)
+    if failed:
+        raise SystemExit(f"Testing failed for host(s): {failed}")
 
 else:
     for host in args.hosts:
-        run(args, host)
\ No newline at end of file
+        run(host, args)
\ No newline at end of file
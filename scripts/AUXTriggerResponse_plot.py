@@ -261,7 +261,7 @@ def plot_ana(data):
 
 if __name__ == "__main__":
     import argparse
-    import json
+    from radiant_test import load_result
 
     parser = argparse.ArgumentParser()
     parser.add_argument("input", help="input JSON file")
@@ -270,8 +270,7 @@ if __name__ == "__main__":
     parser.add_argument("-s", "--show", action="store_true", help="Return figures to be displayed in web")
     args = parser.parse_args()
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
     if args.channel is None:
         plot_all(data, args_input=args.input, args_channel=args.channel, args_web=args.web)
         # plot_ana(data)
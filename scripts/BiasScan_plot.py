@@ -258,7 +258,7 @@ def plot_all(data, args_input="", args_channel=None, args_web=False):
 
 if __name__ == "__main__":
     import argparse
-    import json
+    from radiant_test import load_result
 
     parser = argparse.ArgumentParser()
     parser.add_argument("input", help="input JSON file")
@@ -266,8 +266,7 @@ if __name__ == "__main__":
                         help="Return figures to be displayed in web")
     args = parser.parse_args()
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
 
     print_results(data)
 
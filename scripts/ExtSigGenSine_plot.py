@@ -157,7 +157,7 @@ def print_results(data):
 
 if __name__ == "__main__":
     import argparse
-    import json
+    from radiant_test import load_result
 
     parser = argparse.ArgumentParser()
     parser.add_argument("input", help="input JSON file")
@@ -165,8 +165,7 @@ if __name__ == "__main__":
     parser.add_argument("-w", "--web", action="store_true", help="Return figures to be displayed in web")
     args = parser.parse_args()
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
                 
     # if args.channel == None:
     print_results(data)
@@ -129,7 +129,7 @@ def plot_single(data, ch):
 
 if __name__ == "__main__":
     import argparse
-    import json
+    from radiant_test import load_result
 
     parser = argparse.ArgumentParser()
     parser.add_argument("input", help="input JSON file")
@@ -137,8 +137,7 @@ if __name__ == "__main__":
     parser.add_argument("-w", "--web", action="store_true", help="Return figures to be displayed in web")
     args = parser.parse_args()
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
     if args.channel == None:
         plot_all(data, args_input=args.input, args_channel=args.channel, args_web=args.web)
         print_results(data)
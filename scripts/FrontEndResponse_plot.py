@@ -1,5 +1,4 @@
 import numpy as np
-import json
 import matplotlib.pyplot as plt
 import os
 import argparse
@@ -165,7 +164,7 @@ def plot_channel_wf(fig, ax, data, ch, args_web=False):
 
 if __name__ == "__main__":
     import argparse
-    import json
+    from radiant_test import load_result
 
     parser = argparse.ArgumentParser()
     parser.add_argument("input", help="input JSON file")
@@ -174,8 +173,7 @@ if __name__ == "__main__":
     parser.add_argument("-s", "--show", action="store_true", help="")
     args = parser.parse_args()
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
     if args.channel == None:
         plot_all(data, figure_type='xcorr', args_input=args.input, args_channel=args.channel, args_web=args.web)
         if args.show:
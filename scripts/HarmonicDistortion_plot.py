@@ -1,4 +1,4 @@
-import json
+from radiant_test import load_result
 import numpy as np
 import matplotlib.pyplot as plt
 import argparse
@@ -161,8 +161,7 @@ if __name__ == "__main__":
     parser.add_argument("-w", "--web", action="store_true", help="Return figures to be displayed in web")
     args = parser.parse_args()
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
 
     plot_all(data, args_input=args.input, args_channel=args.channel, args_not_channel=args.not_channel, args_web=args.web)
     print_results(data)
\ No newline at end of file
@@ -4,6 +4,8 @@ import matplotlib.pyplot as plt
 import os
 import colorama
 
+from radiant_test import load_result
+
 
 def get_channels(data):
     return sorted([int(ch) for ch in data["run"]["measurements"].keys()])
@@ -244,25 +246,24 @@ def plot_time_dev(input_files):
         time = datetime.datetime.strptime(date_str, "%Y%m%dT%H%M%S")
         times.append(time)
 
-        with open(fn, "r") as f:
-            data = json.load(f)
+        data = load_result(fn)
 
-            for ch in range(24):
-                seam_mean, seam_std, slow_mean, slow_std = get_channel_data(data, ch)
-                rms_all_mean, rms_all_std, rms_mean, rms_std = get_channel_rms(data, ch)
-                # print(seam_mean, seam_std, slow_mean, slow_std, rms_all_mean, rms_all_std, rms_mean, rms_std)
-                plot_data[fdx, ch] = [seam_mean, seam_std, slow_mean, slow_std, rms_all_mean, rms_all_std, rms_mean, rms_std]
+        for ch in range(24):
+            seam_mean, seam_std, slow_mean, slow_std = get_channel_data(data, ch)
+            rms_all_mean, rms_all_std, rms_mean, rms_std = get_channel_rms(data, ch)
+            # print(seam_mean, seam_std, slow_mean, slow_std, rms_all_mean, rms_all_std, rms_mean, rms_std)
+            plot_data[fdx, ch] = [seam_mean, seam_std, slow_mean, slow_std, rms_all_mean, rms_all_std, rms_mean, rms_std]
 
-            expected_values = data["config"]["expected_values"]
+        expected_values = data["config"]["expected_values"]
 
-            sr_str = "_2G4" if data["radiant_sample_rate"] == 2400 else "_3G2"
-            if "seam_sample_min" in expected_values:
-                sr_str = ""  # old files, limits are for 3G2
+        sr_str = "_2G4" if data["radiant_sample_rate"] == 2400 else "_3G2"
+        if "seam_sample_min" in expected_values:
+            sr_str = ""  # old files, limits are for 3G2
 
-            seam_sample_min = expected_values[f"seam_sample_min{sr_str}"]
-            seam_sample_max = expected_values[f"seam_sample_max{sr_str}"]
-            slow_sample_min = expected_values[f"slow_sample_min{sr_str}"]
-            slow_sample_max = expected_values[f"slow_sample_max{sr_str}"]
+        seam_sample_min = expected_values[f"seam_sample_min{sr_str}"]
+        seam_sample_max = expected_values[f"seam_sample_max{sr_str}"]
+        slow_sample_min = expected_values[f"slow_sample_min{sr_str}"]
+        slow_sample_max = expected_values[f"slow_sample_max{sr_str}"]
 
 
     fig, axs = plt.subplots(nrows=4, ncols=6, figsize=(3 * 6, 2 * 4), sharex=True, sharey=True,
@@ -318,7 +319,6 @@ def plot_time_dev(input_files):
 
 if __name__ == "__main__":
     import argparse
-    import json
 
     parser = argparse.ArgumentParser()
     parser.add_argument("input", nargs="+", help="input JSON file")
@@ -328,8 +328,7 @@ if __name__ == "__main__":
 
 
     if len(args.input) == 1:
-        with open(args.input[0], "r") as f:
-            data = json.load(f)
+        data = load_result(args.input[0])
         if args.channel == None:
             print_results(data)
             plot_all(data, args_input=args.input[0], args_channel=args.channel, args_web=args.web)
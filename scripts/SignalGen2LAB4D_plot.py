@@ -1,5 +1,4 @@
 import numpy as np
-import json
 import matplotlib.pyplot as plt
 import argparse
 import colorama
@@ -161,7 +160,7 @@ def plot_channel(fig, ax, data, ch):
 
 if __name__ == "__main__":
     import argparse
-    import json
+    from radiant_test import load_result
 
     parser = argparse.ArgumentParser()
     parser.add_argument("input", help="input JSON file")
@@ -169,8 +168,7 @@ if __name__ == "__main__":
     parser.add_argument("-w", "--web", action="store_true", help="Return figures to be displayed in web")
     args = parser.parse_args()
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
 
     # n_events = [[
     #     data["run"]["measurements"][f'{ch}']["measured_value"]["raw_data"][f"{i}"]["n_events"] for i in range(4)]
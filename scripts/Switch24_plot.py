@@ -2,7 +2,7 @@ import numpy as np
 from matplotlib import pyplot as plt
 from radiant_test.radiant_helper import uid_to_name
 import argparse
-import json
+from radiant_test import load_result
 
 
 def plot_channel(ax, data, ch, window_label):
@@ -49,8 +49,7 @@ if __name__ == "__main__":
     parser.add_argument("-w", "--web", action="store_true", help="Return figures to be displayed in web")
     args = parser.parse_args()
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
 
     plot_all(data)
     fname = args.input.replace(".json", f'_{data["config"]["args"]["frequency"]}MHz.pdf')
@@ -1,4 +1,5 @@
-import json
+from radiant_test import load_result
+from radiant_test.analysis import window_variation
 import numpy as np
 import matplotlib.pyplot as plt
 import argparse
@@ -17,26 +18,12 @@ def get_figure(channels, args_channel):
 
 
 
-def calculate_variation(rms_per_window_per_event):
-    rms_variation_per_window = np.zeros(32)
-    rms_mean_per_window = np.zeros(32)
-    for i, ele in rms_per_window_per_event.items():
-        rms_mean_per_window[int(i)] = np.mean(ele)
-        rms_variation_per_window[int(i)] = np.std(ele)
-
-    mean_variation = np.mean(rms_variation_per_window)
-    min_power = np.amin(rms_mean_per_window)
-    max_power = np.amax(rms_mean_per_window)
-
-    return mean_variation, min_power, max_power, rms_mean_per_window, rms_variation_per_window
-
-
 def get_measured_values(data):
     measured_val_dict = {'channel': [], 'result': [],'variation': [], 'min power': [], 'max power': []}
 
     channels = sorted([int(ch) for ch in data["run"]["measurements"].keys()])
     for ch in channels:
-        mean_variation, min_power, max_power, _, _ = calculate_variation(data['run']['measurements'][str(ch)]["measured_value"])
+        mean_variation, min_power, max_power, _, _ = window_variation(data['run']['measurements'][str(ch)]["measured_value"])
         measured_val_dict['channel'].append(ch)
         measured_val_dict['result'].append(data['run']['measurements'][str(ch)]['result'])
         measured_val_dict['variation'].append(mean_variation)
@@ -60,7 +47,7 @@ def print_results(data):
 
     for ch, ele in measurements.items():
         result = ele["result"]
-        mean_variation, min_power, max_power, _, _ = calculate_variation(ele["measured_value"])
+        mean_variation, min_power, max_power, _, _ = window_variation(ele["measured_value"])
 
         # Create string for terminal output
         result_str += add_color(result == "PASS") + f"{ch:<5}" + colorama.Style.RESET_ALL + " | "
@@ -90,7 +77,7 @@ def plot_all(data, args_input="", args_channel=None, args_web=False):
 
         result = ele["result"]
 
-        mean_variation, min_power, max_power, mean, std = calculate_variation(ele["measured_value"])
+        mean_variation, min_power, max_power, mean, std = window_variation(ele["measured_value"])
 
         if args_channel is not None and args_channel != int(ch):  # skip
             continue
@@ -128,8 +115,7 @@ if __name__ == "__main__":
     if re.search("WindowStability", args.input) is None:
         raise ValueError(f"Your input fail is invalid. It has to be the result from WindowStability: {args.input}")
 
-    with open(args.input, "r") as f:
-        data = json.load(f)
+    data = load_result(args.input)
 
     plot_all(data, args_input=args.input, args_channel=args.channel, args_web=args.web)
     print_results(data)
\ No newline at end of file
@@ -1,6 +1,6 @@
 import argparse
 from pymongo import MongoClient
-import json
+from radiant_test import load_result
 import os
 
 # opens the connection to the database
@@ -28,9 +28,9 @@ def add_single_measurement(file, set_folder=None):
     else:
         # load the measurement
         if set_folder is not None:
-            result_dict = json.load(open(os.path.join(args.result_dir, set_folder, file)))
+            result_dict = load_result(os.path.join(args.result_dir, set_folder, file), as_lists=True)
         else:
-            result_dict = json.load(open(os.path.join(args.result_dir, file)))
+            result_dict = load_result(os.path.join(args.result_dir, file), as_lists=True)
 
         # add the filename to the dict
         input_mask = result_dict
@@ -0,0 +1,255 @@
+"""
+Benchmark of the analysis hot paths of the tests on synthetic data of production size (recorded with
+the simulated station, see radiant_test.SimulatedStation).
+
+Reports the time (best of `--repeat` runs) and the peak memory (traced by tracemalloc in a separate
+run) of every kernel and compares them to a stored baseline. Run from the main directory (the tests
+are imported from `tests/` and read their config from `testconfig/`):
+
+    PYTHONPATH=. python3 scripts/benchmark_analysis.py --save-baseline    # store benchmark_baseline.json
+    PYTHONPATH=. python3 scripts/benchmark_analysis.py                    # compare against it
+
+Kernels whose test can not be imported (missing optional dependencies) are skipped. The script exits
+with 1 if a kernel got slower or uses more memory than the baseline (beyond `--tolerance`).
+"""
+import importlib
+import json
+import pathlib
+import time
+import tracemalloc
+
+import numpy as np
+
+from radiant_test import RADIANT_NUM_CHANNELS, Test
+from radiant_test.SimulatedStation import SimulatedStation
+
+
+KERNELS = {}
+
+
+def kernel(name, per_event=True):
+    """
+    Registers a benchmark. The decorated function gets the number of events, prepares the data and
+    returns the function to benchmark. Kernels with `per_event=False` run once with a fixed size.
+    """
+    def decorator(func):
+        KERNELS[name] = (func, per_event)
+        return func
+    return decorator
+
+
+def get_test(module_name, class_name=None):
+    """
+    Returns an instance of a test without device: only `Test.__init__` is called, the constructors
+    of the tests differ in their arguments and are not needed for the analysis.
+    """
+    module = importlib.import_module(f"tests.{module_name}")
+    test_class = getattr(module, class_name or module_name)
+    test = test_class.__new__(test_class)
+    Test.__init__(test)
+    test.result_dict["radiant_sample_rate"] = 3200
+    test.logger.disabled = True
+    return test
+
+
+def get_conf(test_name):
+    """ Returns the config of a test (from `testconfig/`) """
+    with open(pathlib.Path("testconfig") / f"{test_name}.json", "r") as f:
+        return json.load(f)
+
+
+def record(n_events, signal="sine", frequency=200, header=False):
+    """ Returns waveforms (events, channels, samples) (and the start windows) of the simulated station """
+    station = SimulatedStation(seed=0, external_signal=signal, frequency=frequency)
+    data = station.daq_record_data(num_events=n_events, read_header=header)["data"]
+    wfs = np.array([event["radiant_waveforms"] for event in data["WAVEFORM"]])
+    if header:
+        return wfs, np.array([header["radiant_start_windows"] for header in data["HEADER"]])
+    return wfs
+
+
+@kernel("sliding_vpp")
+def bench_sliding_vpp(n_events):
+    from radiant_test.analysis import max_sliding_vpp
+    wfs = record(n_events, signal="pulse")[:, 0]
+
+    def func():
+        max_sliding_vpp(wfs, start_index=1400, end_index=1900)
+        max_sliding_vpp(wfs, start_index=50, end_index=800)
+    return func
+
+
+@kernel("SignalGen2LAB4D.get_vpp")
+def bench_get_vpp(n_events):
+    test = get_test("SignalGen2LAB4D")
+    test.data_dir = pathlib.Path("simulated")
+    wfs = record(n_events, signal="pulse")
+    return lambda: test.get_vpp(wfs, 1, 0, 100, {"100": {}}, "100")
+
+
+@kernel("connection_jump_widths")
+def bench_connection_jump_widths(n_events):
+    from radiant_test.analysis import connection_jump_widths
+    block_size = get_conf("LAB4DGlitch")["args"]["events_per_block"]
+    wfs = record(n_events, frequency=93)
+    return lambda: connection_jump_widths(wfs, block_size)
+
+
+@kernel("window_rms_stats")
+def bench_window_stability(n_events):
+    from radiant_test.analysis import window_rms_stats
+    upsampling = get_conf("WindowStability")["args"]["upsampling"]
+    wfs, start_windows = record(n_events, frequency=90, header=True)
+    return lambda: window_rms_stats(wfs, start_windows[..., 0], upsampling=upsampling)
+
+
+@kernel("StreamingLineFit", per_event=False)
+def bench_bias_scan_fit(n_events):
+    from radiant_test.analysis import StreamingLineFit
+    station = SimulatedStation(seed=0)
+    adc_list = np.arange(1200, 2500, 130)
+    pedestals = []
+    for value in adc_list:
+        station.radiant_pedestal_set(value=int(value))
+        pedestals.append(station.radiant_pedestal_get())
+
+    def func():
+        line_fit = StreamingLineFit((RADIANT_NUM_CHANNELS, 4096))
+        for value, pedestal in zip(adc_list, pedestals):
+            line_fit.add(value, pedestal)
+        line_fit.parameters()
+    return func
+
+
+@kernel("SpectrumAccumulator")
+def bench_average_spectrum(n_events):
+    from radiant_test.analysis import SpectrumAccumulator
+    wfs = record(n_events, signal=None)
+
+    def func():
+        spectra = SpectrumAccumulator(2048, sampling_rate=3.2)
+        spectra.add(wfs)
+        spectra.mean, spectra.std
+    return func
+
+
+@kernel("max_correlation")
+def bench_xcorr(n_events):
+    from radiant_test.analysis import CorrelationTemplate, max_correlation
+    wfs = record(n_events, signal="pulse")[:, 0]
+    template = CorrelationTemplate(SimulatedStation(seed=1)._signal("pulse", 0, 1)[0], sampling_rate=3.2e9)
+    return lambda: max_correlation(wfs, template)
+
+
+@kernel("max_correlation (template bank)")
+def bench_xcorr_bank(n_events):
+    from radiant_test.analysis import load_template_bank, max_correlation
+    wfs = record(n_events, signal="pulse")[:, 0]
+    bank = load_template_bank("examples", sampling_rate=3.2e9)
+    return lambda: max_correlation(wfs, bank)
+
+
+@kernel("fit_sine")
+def bench_sine_fit(n_events):
+    from radiant_test.analysis import fit_sine
+    frequency = get_conf("SigGenSine")["args"]["frequency"]
+    wfs = record(n_events, frequency=frequency)[:, 0]
+
+    def func():
+        for wf in wfs:
+            fit_sine(wf, frequency * 1e-3, 3.2)
+    return func
+
+
+@kernel("HarmonicDistortion._analyze_quad")
+def bench_harmonic_distortion(n_events):
+    test = get_test("HarmonicDistortion")
+    test.add_measurement = lambda *args, **kwargs: None
+    test.conf["args"]["channels"] = list(range(RADIANT_NUM_CHANNELS))
+    station = SimulatedStation(seed=0, frequency=test.conf["args"]["frequency"])
+    data = station.daq_record_data(num_events=n_events)
+    return lambda: test._analyze_quad(0, data)
+
+
+def run_kernel(name, n_events, repeat):
+    setup, _ = KERNELS[name]
+    func = setup(n_events)
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"time": min(times), "peak_memory": peak - start}
+
+
+def compare(result, baseline, tolerance):
+    """ Returns the relative change of time and memory and whether one of them exceeds the tolerance """
+    change = {key: result[key] / baseline[key] - 1 if baseline[key] else 0 for key in ["time", "peak_memory"]}
+    return change, any(value > tolerance for value in change.values())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the analysis kernels of the tests on synthetic data")
+    parser.add_argument("--kernels", type=str, nargs="+", default=list(KERNELS), choices=list(KERNELS),
+                        metavar="KERNEL", help="kernels to run (default: all)")
+    parser.add_argument("--events", type=int, nargs="+", default=[100, 1000],
+                        help="number of events (24 channels x 2048 samples each) (default: 100 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs per kernel (default: 3)")
+    parser.add_argument("--baseline", type=str, default="benchmark_baseline.json",
+                        help="baseline file (default: benchmark_baseline.json)")
+    parser.add_argument("--save-baseline", dest="save_baseline", action="store_true",
+                        help="store the results as new baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative increase of time or memory before it counts as regression (default: 0.2)")
+    args = parser.parse_args()
+
+    baseline = dict()
+    baseline_file = pathlib.Path(args.baseline)
+    if not args.save_baseline and baseline_file.exists():
+        with open(baseline_file, "r") as f:
+            baseline = json.load(f)
+
+    results = dict()
+    regressions = []
+    print(f"{'kernel':<52} {'events':>6} {'time [s]':>10} {'peak [MiB]':>11} {'d time':>8} {'d mem':>8}")
+    for name in args.kernels:
+        for n_events in (args.events if KERNELS[name][1] else [None]):
+            key = name if n_events is None else f"{name}/{n_events}"
+            events_str = "-" if n_events is None else str(n_events)
+            try:
+                result = run_kernel(name, n_events, args.repeat)
+            except ImportError as e:
+                print(f"{name:<52} {events_str:>6}  skipped: {e}")
+                continue
+            except Exception as e:
+                print(f"{name:<52} {events_str:>6}  failed: {e.__class__.__name__}: {e}")
+                continue
+
+            results[key] = result
+            line = f"{name:<52} {events_str:>6} {result['time']:10.3f} {result['peak_memory'] / 1024 ** 2:11.1f}"
+            if key in baseline:
+                change, regressed = compare(result, baseline[key], args.tolerance)
+                line += f" {change['time']:+8.0%} {change['peak_memory']:+8.0%}"
+                if regressed:
+                    line += "  REGRESSION"
+                    regressions.append(key)
+            print(line)
+
+    if args.save_baseline:
+        with open(baseline_file, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Stored baseline in {baseline_file}")
+    elif regressions:
+        raise SystemExit(f"Regressions: {regressions}")
@@ -0,0 +1,16 @@
+from radiant_test.result_index import ResultIndex
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("results_dir", type=str, nargs="?", default="results",
+                        help="results directory to index (default: results)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    n_files = ResultIndex(args.results_dir).rebuild()
+    print(f"Indexed {n_files} result file(s) in {args.results_dir}")
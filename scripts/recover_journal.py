@@ -0,0 +1,44 @@
+import json
+import logging
+import pathlib
+
+from radiant_test.Test import TestResult
+from radiant_test.journal import MeasurementJournal
+
+
+def recover_journal(filename):
+    """
+    Create a result file from the journal of a test which did not finish (e.g. after a crash).
+    The recovered result is marked as DID_NOT_RUN.
+    """
+    p = pathlib.Path(filename)
+    result_dict, measurements = MeasurementJournal.load(p)
+
+    result_dict["run"]["measurements"] = measurements
+    result_dict["result"] = TestResult.DID_NOT_RUN.name
+
+    fname = p.parent / p.name.replace(MeasurementJournal.suffix, ".json")
+    with open(fname, "w") as f:
+        json.dump(result_dict, f, indent=4)
+
+    print(f"Recovered {len(measurements)} measurement(s) of {result_dict['test_name']} into {fname}")
+    return fname
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", type=str, nargs="+", help="journal files or directories containing journals")
+    args = parser.parse_args()
+
+    for input in args.input:
+        p = pathlib.Path(input)
+        if not p.exists():
+            logging.error(f"File does not exist: {p}")
+            continue
+        if p.is_dir():
+            for filename in p.glob(f"*{MeasurementJournal.suffix}"):
+                recover_journal(filename)
+        else:
+            recover_journal(p)
@@ -1,4 +1,3 @@
-import json
 import logging
 import pathlib
 
@@ -16,8 +15,7 @@ def summarize_directory(path, failed_only=False, verbose=False):
 
 def summarize_file(filename, failed_only=False, verbose=False):
     p = pathlib.Path(filename)
-    with open(p, "r") as f:
-        result_dict = json.load(f)
+    result_dict = radiant_test.load_result(p)
     radiant_test.Test.print_result(
         name=p, result_dict=result_dict, failed_only=failed_only, verbose=verbose
     )
@@ -1,7 +1,5 @@
 import argparse
 import radiant_test
-import stationrc.common
-import stationrc.remote_control
 import numpy as np
 import uproot
 import radiant_test.radiant_helper as rh
@@ -33,7 +31,7 @@ class AUXTrigger(radiant_test.RADIANTChannelTest):
         self.device.radiant_calselect(quad=quad)
 
     def initialize_config(self, channel, threshold, run_length):
-        run = stationrc.remote_control.Run(self.device)
+        run = rh.create_run(self.device)
         for ch in range(24):
             run.run_conf.radiant_threshold_initial(ch, threshold)
 
@@ -53,8 +51,7 @@ class AUXTrigger(radiant_test.RADIANTChannelTest):
         self.data_dir = run.start(delete_src=True, rootify=True)
 
     def calc_trigger(self, root_file, channel, run_length, ref_freq):
-        f = uproot.open(root_file)
-        data = f["combined"]
+        data = rh.open_combined(root_file)
 
         has_surface = data['header/trigger_info/trigger_info.radiant_trigger'].array() is True
         mask_rf0 = data['header/trigger_info/trigger_info.which_radiant_trigger'].array() == 0
@@ -1,15 +1,15 @@
 import radiant_test
-import stationrc.common
-import stationrc.remote_control
 import numpy as np
 import uproot
 from scipy.optimize import curve_fit
 import logging
 import os
-import re
-import json
-from radiant_test.radiant_helper import uid_to_name
-from radiant_test.util import make_serializable, check_param
+from radiant_test.radiant_helper import open_combined, uid_to_name
+from radiant_test.result_index import ResultIndex
+from radiant_test.util import check_param
+
+# Tests which measure the amplitude conversion (see load_amplitude_conversion)
+AMPLITUDE_CONVERSION_TESTS = ["SignalGen2LAB4D", "SignalGen2LAB4Dv2", "SignalGen2LAB4Dv3"]
 
 def hill_eq(x, x0, p):
     return 1 / (1 + (x0 / x)**p)
@@ -17,18 +17,6 @@ def hill_eq(x, x0, p):
 def tanh_func(x, b, c):
     return 0.5*(np.tanh((x-b)/c) + 1)
 
-def calc_sliding_vpp(data, window_size=30, start_index=1400, end_index=1900):
-    vpps = []
-    indices = []
-    h = window_size // 2
-    for i in range(start_index, end_index):
-        window = data[i-h:i+h]
-        vpp = np.max(window) - np.min(window)
-        indices.append(i)
-        vpps.append(vpp)
-
-    return vpps, indices
-
 def monotonic(x):
     dx = np.diff(x)
     print('dx', dx)
@@ -37,28 +25,43 @@ def monotonic(x):
     return res
 
 class AUXTriggerResponseThresh(radiant_test.SigGenTest):
+    inputs = ["amplitude_conversion"]
+
     def __init__(self, **kwargs):
         super(AUXTriggerResponseThresh, self).__init__(**kwargs)
+        self._amplitude_conversion_result = None
+
+    def load_amplitude_conversion_result(self):
+        """ Load the configured or the newest SignalGen2LAB4D result of the board from disk (only once) """
+        if self._amplitude_conversion_result is None:
+            if self.conf['args']['amp_conversion_file'] is None:
+                ulb_id = uid_to_name(self.result_dict['dut_uid'])
+                # Newest result of SignalGen2LAB4D for this board
+                amp_conversion_file = ResultIndex().find_newest(
+                    directory='results', dut_name=ulb_id, base_test=AMPLITUDE_CONVERSION_TESTS)
+                if amp_conversion_file is None:
+                    raise FileNotFoundError(f'No SignalGen2LAB4D result for {ulb_id} found in results/')
+
+            else:
+                amp_conversion_file = self.conf['args']['amp_conversion_file']
+
+            self._amplitude_conversion_result = radiant_test.load_result(amp_conversion_file)
+
+        return self._amplitude_conversion_result
 
     def load_amplitude_conversion(self, channel):
+        fit_parameter = None
         if self.conf['args']['amp_conversion_file'] is None:
-            result_path = 'results/'
-            ulb_id = uid_to_name(self.result_dict['dut_uid'])
-            # Get a list of files in the directory
-            files = [os.path.join(result_path, file) for file in os.listdir(result_path)
-                    if re.search('SignalGen2LAB4D', file) and file.endswith('.json') and re.search(ulb_id, file)]
-            # Find the newest file based on modification time
-            amp_conversion_file = max(files, key=os.path.getmtime) #search for the newest file
+            # Measured by SignalGen2LAB4D earlier in the same TestSet
+            fit_parameter = self.get_artifact(
+                'amplitude_conversion', channel=channel, waveform=self.conf['args']['waveform'])
 
-        else:
-            amp_conversion_file = self.conf['args']['amp_conversion_file']
-
-        with open(amp_conversion_file) as f:
-            result_dict = json.load(f)
+        if fit_parameter is None:
+            result_dict = self.load_amplitude_conversion_result()
+            fit_parameter = result_dict['run']['measurements'][str(channel)]['measured_value']['fit_parameter']
 
         def amplitude_conversion(x):
-            return x * result_dict['run']['measurements'][str(channel)]['measured_value']['fit_parameter']['slope'] + \
-                result_dict['run']['measurements'][str(channel)]['measured_value']['fit_parameter']['intercept']
+            return x * fit_parameter['slope'] + fit_parameter['intercept']
 
         return amplitude_conversion
 
@@ -72,8 +75,7 @@ class AUXTriggerResponseThresh(radiant_test.SigGenTest):
                 trig_eff = 0
                 trig_eff_err = 0.01
             else:
-                f = uproot.open(root_file)
-                data = f["combined"]
+                data = open_combined(root_file)
 
                 waveforms = np.array(data['waveforms/radiant_data[24][2048]'])  #events, channels, samples
                 has_surface = data['header/trigger_info/trigger_info.radiant_trigger'].array() == True
@@ -142,7 +144,7 @@ class AUXTriggerResponseThresh(radiant_test.SigGenTest):
 
 
             sg_ch, sg_ch_clock, ch_radiant_clock = self.get_channel_settings(
-                ch_radiant, use_arduino=~self.conf["args"]["channel_setting_manual"],
+                ch_radiant, use_arduino=not self.conf["args"]["channel_setting_manual"],
                 channel_setting_manual=self.conf["args"]["channel_setting_manual"])
 
             amplitude_conversion = self.load_amplitude_conversion(ch_radiant)
@@ -180,10 +182,7 @@ class AUXTriggerResponseThresh(radiant_test.SigGenTest):
                 self.data_dir = self.finish_run(daq_run, delete_src=True)
                 self.logger.info(f'Stored run at {self.data_dir}')
 
-                stationrc.common.rootify(
-                    self.data_dir, self.device.station_conf["daq"]["mattak_directory"])
-
-                root_file_channel_trigger = self.data_dir / "combined.root"
+                root_file_channel_trigger = self.rootify(self.data_dir)
                 trig_eff_point, trig_eff_err = self.calc_trigger_eff_points(
                     root_file_channel_trigger, ch_radiant, ch_radiant_clock)
 
@@ -194,7 +193,6 @@ class AUXTriggerResponseThresh(radiant_test.SigGenTest):
 
             dic_out = self.fit_trigger_curve(self.dic_curve)
             dic_out['vpp_ch'] = vpp_ch
-            dic_out = make_serializable(dic_out)
             self.add_measurement(f"{ch_radiant}", dic_out, passed=True)
 
             # with open('/scratch/rno-g/radiant_data/AUXTrigger_Response_buffer.json', 'w') as f:
@@ -1,7 +1,10 @@
+import concurrent.futures
+
 import numpy as np
-import scipy.optimize
 
 import radiant_test
+from radiant_test.analysis import StreamingLineFit
+from radiant_test.timing import current_span, span
 
 
 class BiasScan(radiant_test.RADIANTTest):
@@ -18,21 +21,20 @@ class BiasScan(radiant_test.RADIANTTest):
         self.device.radiant_sig_gen_off()
         self.device.radiant_calselect(None)
 
-        adc_list, pedestals = self.bias_scan(
+        adc_list, pedestals, line_fit = self.bias_scan(
             self.conf["args"]["start"], self.conf["args"]["stop"],
             self.conf["args"]["points"])
 
-        # v_adc, channel, sample -> channel, v_adc, sample
-        pedestals = np.swapaxes(pedestals, 0, 1)
+        # channel, sample
+        slopes, intercepts = line_fit.parameters()
 
-        for ch, ped in enumerate(pedestals):
-            fit_param = np.array([fit(adc_list, ped[:, sample])[1:] for sample in range(4096)])
+        for ch in range(pedestals.shape[1]):
             data = {
                 "bias_dac": adc_list.tolist(),
-                # pedestals are the avererage of 512 int-pedestals. Convert back to minimize file size
-                "bias_adc": np.array(ped * 512, dtype=int).tolist(),
+                # pedestals are the avererage of 512 int-pedestals, stored as their sum to minimize file size
+                "bias_adc": pedestals[:, ch].tolist(),
                 # Use np.around to minimize file size
-                "line_fit_para": [np.around(fit_param.T[0], 3).tolist(), np.around(fit_param.T[1], 1).tolist()]
+                "line_fit_para": [np.around(slopes[ch], 3).tolist(), np.around(intercepts[ch], 1).tolist()]
             }
             self.add_measurement(f"{ch}", data, passed=self.check_line_fit(data))
 
@@ -69,29 +71,63 @@ class BiasScan(radiant_test.RADIANTTest):
 
 
     def bias_scan(self, start, end, points):
-        intervals = np.arange(int(start), int(end), int((end - start) / points))
+        """
+        Takes pedestals at `points` bias (DAC) values between `start` and `end` and fits a line
+        to the pedestal of every sample while the scan is running.
 
-        pedestals = np.zeros((len(intervals), 24, 4096))
+        Unless `["args"]["pipeline_sweep"]` is set to false, the pedestal of one bias point is
+        converted and added to the fit in a background thread while the station sets the next
+        bias value and reads its pedestal.
 
-        for idx, v in enumerate(intervals):
-            self.logger.info(f"Take pedestals at {int(v)}")
-            self.device.radiant_pedestal_set(value = int(v))
-            pedestal_at_v = np.array(self.device.radiant_pedestal_get())
+        Returns
+        -------
 
-            pedestals[idx] = pedestal_at_v
+        bias_scan: array (bias points)
+            The bias DAC values
 
-        bias_scan = np.array(intervals)
+        pedestals: array of int32 (bias points, channels, samples)
+            Pedestals in units of 1/512 ADC counts (the sums of the 512 int-pedestals)
+
+        line_fit: radiant_test.analysis.StreamingLineFit (channels, samples)
+            Fits of the pedestals (in ADC counts) vs. the bias DAC values
+        """
+        intervals = np.arange(int(start), int(end), max(1, int((end - start) / points)))
+
+        pedestals = np.zeros((len(intervals), 24, 4096), dtype=np.int32)
+        line_fit = StreamingLineFit((24, 4096))
+
+        pipeline = self.conf["args"].get("pipeline_sweep", True)
+        # The processing runs in another thread, its timing spans are added to the span of the caller
+        parent = current_span()
 
-        return bias_scan, pedestals
+        def process(idx, v, pedestal_at_v):
+            with span(f"process_pedestal_{int(v)}", parent=parent):
+                pedestal_at_v = np.asarray(pedestal_at_v, dtype=float)
+                pedestals[idx] = np.rint(pedestal_at_v * 512)
+                line_fit.add(v, pedestal_at_v)
 
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name) as executor:
+            processing = None
+            for idx, v in enumerate(intervals):
+                self.logger.info(f"Take pedestals at {int(v)}")
+                self.device.radiant_pedestal_set(value = int(v))
+                pedestal_at_v = self.device.radiant_pedestal_get()
 
-def line(x, m, b):
-    return m * x + b
+                # At most one pedestal is waiting for its processing (propagates its exceptions)
+                if processing is not None:
+                    processing.result()
+
+                if pipeline:
+                    processing = executor.submit(process, idx, v, pedestal_at_v)
+                else:
+                    process(idx, v, pedestal_at_v)
+
+            if processing is not None:
+                processing.result()
+
+        bias_scan = np.array(intervals)
 
-def fit(adc, samples):
-    opt, _ = scipy.optimize.curve_fit(line, xdata=adc, ydata=samples)
-    lin_fit = opt[0] * adc + opt[1]
-    return lin_fit, opt[0], opt[1]
+        return bias_scan, pedestals, line_fit
 
 
 if __name__ == "__main__":
@@ -2,17 +2,22 @@ import numpy as np
 import scipy.optimize
 
 import radiant_test
+from radiant_test.instruments import get_arduino, get_awg
 
 
 class ExtSigGenSine(radiant_test.RADIANTChannelTest):
+    resources = ["station", "awg", "arduino"]
+
     def __init__(self):
         super(ExtSigGenSine, self).__init__()
-        self.awg = radiant_test.Keysight81160A(self.site_conf['signal_gen_ip_address'])
-        try:
-            self.arduino = radiant_test.ArduinoNano()
-        except:
-            print("WARNING: Arduino not connected")
-            self.arduino = None
+
+    @property
+    def awg(self):
+        return get_awg(self.site_conf['signal_gen_ip_address'])
+
+    @property
+    def arduino(self):
+        return get_arduino()
 
     def run(self):
         super(ExtSigGenSine, self).run()
@@ -9,18 +9,16 @@ class FPGAComms(radiant_test.RADIANTTest):
     def run(self):
         super(FPGAComms, self).run()
 
-        fpga_id = stationrc.radiant.register_to_string(
-            self.device.radiant_low_level_interface.read_register("FPGA_ID")
-        )
+        registers = self.device.radiant_low_level_interface.refresh_registers(["FPGA_ID", "FPGA_DATEVERSION"])
+
+        fpga_id = stationrc.radiant.register_to_string(registers["FPGA_ID"])
         self.add_measurement(
             "fpga_id",
             fpga_id,
             fpga_id == self.conf["expected_values"]["fpga_id"],
         )
 
-        fpga_date_version = stationrc.radiant.DateVersion(
-            self.device.radiant_low_level_interface.read_register("FPGA_DATEVERSION")
-        ).toDict()
+        fpga_date_version = stationrc.radiant.DateVersion(registers["FPGA_DATEVERSION"]).toDict()
         self.add_measurement(
             "fpga_date",
             fpga_date_version["date"],
@@ -1,7 +1,7 @@
 import numpy as np
 
 import radiant_test
-from NuRadioReco.utilities import fft
+from radiant_test.analysis import SpectrumAccumulator
 from scipy.optimize import curve_fit
 
 
@@ -14,18 +14,14 @@ class FrontEndNoise(radiant_test.RADIANTChannelTest):
 
         self._run_channels()
 
-    def _calculate_average_spectrum(self, wfs):
+    def _calculate_average_spectrum(self, spectra, ich):
+        """ Returns the average spectrum of the `ich`-th channel of the `spectra` (SpectrumAccumulator) """
         save_data = dict()
 
-        # calculate the average spectrum
-        frequency_spectra = [np.abs(fft.time2freq(wf, (self.result_dict["radiant_sample_rate"] / 1000))) for wf in wfs]
-        average_frequency_spec = np.mean(frequency_spectra, axis=0)
-
-        # calculate the frequency
-        frequency = np.fft.rfftfreq(len(wfs[0]), d=(1. / (self.result_dict["radiant_sample_rate"] / 1000)))
-
-        save_data['frequency'] = list(frequency)
-        save_data['average_frequency_spectrum'] = list(average_frequency_spec)
+        save_data['frequency'] = spectra.frequencies.tolist()
+        save_data['average_frequency_spectrum'] = spectra.mean[ich].tolist()
+        save_data['std_frequency_spectrum'] = spectra.std[ich].tolist()
+        save_data['number_of_events'] = spectra.n_events
 
         return save_data
 
@@ -89,17 +85,27 @@ class FrontEndNoise(radiant_test.RADIANTChannelTest):
     def _run_channels(self):
         self.logger.info(f"Start data taking")
 
-        data = self.device.daq_record_data(
-            num_events=self.conf['args']['number_of_used_events'], force_trigger=True,
-            force_trigger_interval=self.conf['args']['force_trigger_interval'],
-            use_uart=self.conf['args']['use_uart'])
+        channels = self.conf['args']['channels']
+        # GHz, the spectra are normalized like NuRadioReco.utilities.fft.time2freq
+        spectra = SpectrumAccumulator(2048, sampling_rate=self.result_dict["radiant_sample_rate"] / 1000)
+
+        # The events are read out (and their spectra accumulated) in blocks to limit the memory
+        n_events = self.conf['args']['number_of_used_events']
+        events_per_readout = self.conf['args'].get('events_per_readout', 1000)
+        for start in range(0, n_events, events_per_readout):
+            data = self.device.daq_record_data(
+                num_events=min(events_per_readout, n_events - start), force_trigger=True,
+                force_trigger_interval=self.conf['args']['force_trigger_interval'],
+                use_uart=self.conf['args']['use_uart'])
+
+            # events, channels, samples
+            spectra.add(np.array([[event['radiant_waveforms'][ch] for ch in channels]
+                                  for event in data["data"]["WAVEFORM"]]))
 
-        waveforms = data["data"]["WAVEFORM"]
         self.logger.info(f"Data taking done")
-        for ich, ch in enumerate(self.conf['args']['channels']):
-            channel_data = [event['radiant_waveforms'][ich] for event in waveforms]
+        for ich, ch in enumerate(channels):
             self.logger.info(f"Check channel {ch}")
-            data = self._calculate_average_spectrum(channel_data)
+            data = self._calculate_average_spectrum(spectra, ich)
             data = self._fit_average_spectrum(data)
             self.add_measurement(f"{ch}", data, passed=self._check_fit(data))
 
@@ -4,44 +4,55 @@ import radiant_test
 import numpy as np
 import uproot
 import numpy as np
-from numpy import linalg as LA
 import os
 import logging
-from radiant_test.radiant_helper import uid_to_name
-import re
+from radiant_test.analysis import CorrelationTemplate, load_template, load_template_bank, max_correlation
+from radiant_test.radiant_helper import open_combined, uid_to_name
+from radiant_test.result_index import ResultIndex
 
 
 class FrontEndResponse(radiant_test.RADIANTChannelTest):
+    # Only analyses the runs recorded by SignalGen2LAB4D, does not use the station (apart from initialize)
+    resources = []
+    inputs = ["signal_runs"]
+
     def __init__(self, **kwargs):
         super(FrontEndResponse, self).__init__(**kwargs)
+        self._signal_runs_results = {}
 
-    def get_root_files(self, search_dir, channel):
+    def load_signal_runs_result(self, search_dir, base_test):
+        """ Load the newest result of `base_test` for the particular board in search_dir (only once) """
+        if (search_dir, base_test) not in self._signal_runs_results:
+            ulb_id = uid_to_name(self.result_dict['dut_uid'])
+            file = ResultIndex().find_newest(directory=search_dir, dut_name=ulb_id, base_test=base_test)
+            if file is None:
+                raise FileNotFoundError(f"No {base_test} result for {ulb_id} found in {search_dir}")
 
-        # Get all json files for the particular board and test
-        ulb_id = uid_to_name(self.result_dict['dut_uid'])
-        search_str = 'SignalGen2LAB4D'
-        if self.conf['args']['v2']:
-            search_str += "v2"
+            self._signal_runs_results[(search_dir, base_test)] = (file, radiant_test.load_result(file))
 
-        files = [os.path.join(search_dir, file) for file in os.listdir(search_dir)
-                 if re.search(search_str, file) and file.endswith('.json') and re.search(ulb_id, file)]
+        return self._signal_runs_results[(search_dir, base_test)]
 
-        # Get the last readable file
-        sorted_files = sorted(files, key=os.path.getmtime, reverse=True)
-        for file in sorted_files:
-            if os.path.isfile(file):
-                with open(file, 'r') as f:
-                    data = json.load(f)
-                break
+    def get_root_files(self, search_dir, channel):
 
-        vals = data['run']['measurements'][str(channel)]['measured_value']
-        self.logger.info(f"Evaluate FrontEndResponse for channel {channel} based on {file}")
+        base_test = 'SignalGen2LAB4D'
+        if self.conf['args']['v2']:
+            base_test += "v2"
+
+        # Runs recorded by SignalGen2LAB4D (or v2) earlier in the same TestSet, otherwise from its result file
+        runs = self.get_artifact('signal_runs', channel=channel, test=base_test)
+        if runs is not None:
+            self.logger.info(f"Evaluate FrontEndResponse for channel {channel} based on the runs of {base_test}")
+        else:
+            file, data = self.load_signal_runs_result(search_dir, base_test)
+            vals = data['run']['measurements'][str(channel)]['measured_value']
+            self.logger.info(f"Evaluate FrontEndResponse for channel {channel} based on {file}")
+            runs = list(vals['raw_data'].values())
 
         root_files = []
         amps = []
-        for key in vals['raw_data']:
-            root_file = vals['raw_data'][key]['run'] + "/combined.root"
-            amp = vals['raw_data'][key]['amp']
+        for run in runs:
+            root_file = run['run'] + "/combined.root"
+            amp = run['amp']
             root_files.append(root_file)
             amps.append(amp)
 
@@ -54,8 +65,7 @@ class FrontEndResponse(radiant_test.RADIANTChannelTest):
         return np.array(data['waveform'])
 
     def get_measured_waveforms(self, root_file, ch, return_time=False):
-        f = uproot.open(root_file)
-        data = f["combined"]
+        data = open_combined(root_file)
         waveforms = np.array(data['waveforms/radiant_data[24][2048]'])  #events, channels, samples
         if not return_time:
             return waveforms[:, ch]
@@ -66,49 +76,38 @@ class FrontEndResponse(radiant_test.RADIANTChannelTest):
 
     def calc_xcorr(self, dataTrace, templateTrace, window_size=200 * 1e-9, sampling_rate=3.2 * 1e9,
                    return_time_difference=False):
-        # preparing the traces
-        dataTrace = np.float32(dataTrace)
-        templateTrace = np.float32(templateTrace)
-
-        # create the template window
-        window_steps = window_size * (sampling_rate)
-
-        max_amp = max(abs(templateTrace))
-        max_amp_i = np.where(abs(templateTrace) == max_amp)[0][0]
-        lower_bound = int(max_amp_i - window_steps / 3)
-        upper_bound = int(max_amp_i + 2 * window_steps / 3)
-        templateTrace = templateTrace[lower_bound:upper_bound]
-
-        # zero padding on the data trace
-        dataTrace = np.append(np.zeros(len(templateTrace) - 1), dataTrace)
-        dataTrace = np.append(dataTrace, np.zeros(len(templateTrace) - 1))
-
-        # only calculate the correlation of the part of the trace where at least 10% of the maximum is visible (fastens the calculation)
-        max_amp_data = max(abs(dataTrace))
-        help_val = np.where(abs(dataTrace) >= 0.1 * max_amp_data)[0]
-        lower_bound_data = help_val[0] - (len(templateTrace) - 1)
-        upper_bound_data = help_val[len(help_val) - 1] + (len(templateTrace) - 1)
-        dataTrace = dataTrace[lower_bound_data:upper_bound_data]
-
-        # run the correlation using matrix multiplication
-        dataMatrix = np.lib.stride_tricks.sliding_window_view(dataTrace, len(templateTrace))
-        corr_numerator = dataMatrix.dot(templateTrace)
-        norm_dataMatrix = LA.norm(dataMatrix, axis=1)
-        norm_templateTrace = LA.norm(templateTrace)
-        corr_denominator = norm_dataMatrix * norm_templateTrace
-        correlation = corr_numerator / corr_denominator
-
-        max_correlation = max(abs(correlation))
-        max_corr_i = np.where(abs(np.asarray(correlation)) == max_correlation)[0][0]
+        """ Normalized cross-correlation of a single trace, see `radiant_test.analysis.max_correlation` """
+        template = CorrelationTemplate(templateTrace, sampling_rate=sampling_rate, window_size=window_size)
+        max_correlation_, time_diff = max_correlation(np.asarray(dataTrace)[None], template)
 
         if return_time_difference:
-            # calculate the time difference between the beginning of the template and
-            # data trace for the largest correlation value time difference is given in ns
-            time_diff = (max_corr_i + (lower_bound_data - len(templateTrace))) / sampling_rate
-        if return_time_difference:
-            return max_correlation, time_diff
+            return max_correlation_[0], time_diff[0]
+        else:
+            return max_correlation_[0]
+
+    def calc_xcorrs(self, wfs_measured, data):
+        """
+        Correlates all waveforms of one amplitude with the template (and the template bank if
+        configured) and stores mean and std of the maximal correlations in `data`
+        """
+        sampling_rate = self.result_dict["radiant_sample_rate"] * 1e6
+        template = load_template(self.conf['args']['template'], sampling_rate)
+
+        wfs_measured = np.asarray(wfs_measured)
+        if len(wfs_measured):
+            data['measured_waveform'] = wfs_measured[0].tolist()
+            ccs, _ = max_correlation(wfs_measured, template)
         else:
-            return max_correlation
+            ccs = np.array([])
+
+        data['xcorr'] = np.mean(ccs)
+        data['xcorr_std'] = np.std(ccs)
+
+        if self.conf['args'].get('template_bank') and len(wfs_measured):
+            bank = load_template_bank(self.conf['args']['template_bank'], sampling_rate)
+            ccs_bank, _ = max_correlation(wfs_measured, bank)
+            data['xcorr_bank'] = {
+                bank_template.name: float(np.mean(bank_ccs)) for bank_template, bank_ccs in zip(bank, ccs_bank)}
 
     def eval_results(self, data, channel):
         passed = False
@@ -199,39 +198,14 @@ class FrontEndResponse(radiant_test.RADIANTChannelTest):
                     key = f'{amp:.0f}'
                     data[key] = {}
                     data[key]['root_files'] = root_files[0]
-                    ccs = []
-                    for idx, wf_measured in enumerate(wfs_measured):
-                        if idx == 0:
-                            data[key]['measured_waveform'] = wf_measured.tolist()
-
-                        cc = self.calc_xcorr(
-                            wf_measured, wf_truth, sampling_rate=self.result_dict["radiant_sample_rate"] * 1e6)
-
-                        ccs.append(cc)
-
-                    cc_per_amp = np.mean(ccs)
-                    data[key]['xcorr'] = cc_per_amp
-                    data[key]['xcorr_std'] = np.std(ccs)
+                    self.calc_xcorrs(wfs_measured, data[key])
             else:
                 for root_file, amp in zip(root_files, amps):
                     key = f'{amp:.0f}'
                     data[key] = {}
                     data[key]['root_files'] = root_file
                     wfs_measured = self.get_measured_waveforms(root_file, ch)
-
-                    ccs = []
-                    for idx, wf_measured in enumerate(wfs_measured):
-                        if idx == 0:
-                            data[key]['measured_waveform'] = wf_measured.tolist()
-
-                        cc = self.calc_xcorr(
-                            wf_measured, wf_truth, sampling_rate=self.result_dict["radiant_sample_rate"] * 1e6)
-
-                        ccs.append(cc)
-
-                    cc_per_amp = np.mean(ccs)
-                    data[key]['xcorr'] = cc_per_amp
-                    data[key]['xcorr_std'] = np.std(ccs)
+                    self.calc_xcorrs(wfs_measured, data[key])
 
             passed = self.eval_results(data, ch)
             self.add_measurement(f"{ch}", data, passed)
@@ -1,6 +1,7 @@
 import numpy as np
 
 import radiant_test
+from radiant_test.analysis import SpectrumAccumulator
 
 
 class HarmonicDistortion(radiant_test.RADIANTChannelTest):
@@ -23,10 +24,8 @@ class HarmonicDistortion(radiant_test.RADIANTChannelTest):
                 frequency=self.conf["args"]["frequency"]
             )
 
-        for quad in self.get_quads():
-            if not self.conf["args"]["external_signal"]:
-                self.device.radiant_calselect(quad=quad)
-            self._run_quad(quad)
+        self.run_quads(self._record_quad, self._analyze_quad,
+                       calselect=not self.conf["args"]["external_signal"])
 
         self.device.radiant_sig_gen_off()
         self.device.radiant_calselect(quad=None)
@@ -41,16 +40,21 @@ class HarmonicDistortion(radiant_test.RADIANTChannelTest):
         else:
             return True
 
-    def calculate_harmoic_distortion(self, wfs):
+    def calculate_harmoic_distortion(self, spec):
+        """ Calculates the harmonic distortion from the (average) amplitude spectrum `spec` of 2048 samples """
 
         signal_frequency = self.conf["args"]["frequency"] * 1e6  # conversion to Hz
 
-        spec = np.abs(np.fft.rfft(wfs))
         frequencies = np.fft.rfftfreq(2048, 1 / (self.result_dict["radiant_sample_rate"] * 1e6))
 
-        signal_bin = np.argmin(np.abs(frequencies - signal_frequency))
-        signal_amplitude = np.amax(spec[signal_bin-2:signal_bin+2])
-        signal_bin = np.arange(len(frequencies))[spec == signal_amplitude]
+        def get_peak(frequency):
+            # Largest amplitude within 2 bins around the frequency
+            nth_bin = np.argmin(np.abs(frequencies - frequency))
+            start = max(nth_bin - 2, 0)
+            peak_bin = start + int(np.argmax(spec[start:nth_bin + 2]))
+            return nth_bin, peak_bin, spec[peak_bin]
+
+        _, signal_bin, signal_amplitude = get_peak(signal_frequency)
 
         harmonics_sqared_sum = 0
         nth = 2
@@ -58,22 +62,18 @@ class HarmonicDistortion(radiant_test.RADIANTChannelTest):
         while True:
             nth_freq = nth * signal_frequency
             nth += 1
-            nth_bin = np.argmin(np.abs(frequencies - nth_freq))
+            nth_bin, harmonic_bin, harmonic_ampl = get_peak(nth_freq)
 
             if nth_bin >= len(frequencies) - 1:
                 break
 
-            harmonic_ampl = np.amax(spec[nth_bin-2:nth_bin+2])
-            nth_bin = np.arange(len(frequencies))[spec == harmonic_ampl]
-
-            harmonic_bins.append(int(nth_bin))
+            harmonic_bins.append(harmonic_bin)
             harmonics_sqared_sum += harmonic_ampl ** 2
 
         harmonic_distortion = np.sqrt(harmonics_sqared_sum) / signal_amplitude
         harmonic_distortion2 = np.sqrt(np.sum(spec ** 2) - signal_amplitude ** 2) / signal_amplitude
 
         data = {
-            "waveform": list(wfs),
             "spectrum": list(spec),
             # "frequencies": list(frequencies),  # same for each channel
             "signal_bin": int(signal_bin),
@@ -85,18 +85,28 @@ class HarmonicDistortion(radiant_test.RADIANTChannelTest):
 
         return data
 
-    def _run_quad(self, quad):
-        data = self.device.daq_record_data(
-            num_events=1, force_trigger=True, use_uart=self.conf["args"]["use_uart"]
+    def _record_quad(self, quad):
+        # The goalposts are for the spectrum of a single event, averaging more events lowers the noise floor
+        return self.device.daq_record_data(
+            num_events=self.conf["args"].get("num_events", 1), force_trigger=True, use_uart=self.conf["args"]["use_uart"]
         )
-        event = data["data"]["WAVEFORM"][0]
-        for ch in radiant_test.get_channels_for_quad(quad):
-            if ch not in self.conf["args"]["channels"]:
-                continue
-
-            if ch in self.conf["args"]["channels"]:
-                data = self.calculate_harmoic_distortion(event["radiant_waveforms"][ch])
-                self.add_measurement(f"{ch}", data, passed=self.check_data(data))
+
+    def _analyze_quad(self, quad, data):
+        channels = [ch for ch in radiant_test.get_channels_for_quad(quad) if ch in self.conf["args"]["channels"]]
+        if not channels:
+            return
+
+        # events, channels, samples
+        wfs = np.array([[event["radiant_waveforms"][ch] for ch in channels] for event in data["data"]["WAVEFORM"]])
+        spectra = SpectrumAccumulator(2048)
+        spectra.add(wfs)
+
+        for ich, ch in enumerate(channels):
+            data = self.calculate_harmoic_distortion(spectra.mean[ich])
+            data["waveform"] = wfs[0, ich].tolist()  # first event
+            data["spectrum_std"] = spectra.std[ich].tolist()
+            data["n_events"] = spectra.n_events
+            self.add_measurement(f"{ch}", data, passed=self.check_data(data))
 
 
 if __name__ == "__main__":
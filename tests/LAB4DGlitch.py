@@ -1,6 +1,7 @@
 import numpy as np
 
 import radiant_test
+from radiant_test.analysis import connection_jump_widths
 
 
 class LAB4DGlitch(radiant_test.RADIANTChannelTest):
@@ -19,12 +20,8 @@ class LAB4DGlitch(radiant_test.RADIANTChannelTest):
             frequency=self.conf["args"]["frequency"]
         )
 
-        for quad in self.get_quads():
-
-            # select the quad for calibration (connect to the signal generator)
-            self.device.radiant_calselect(quad=quad)
-            # run the test for the selected quad
-            self._run_quad(quad)
+        # select each quad for calibration (connect to the signal generator) and run the test for it
+        self.run_quads(self._record_quad, self._analyze_quad)
 
         # disconnect the quads from the signal generator
         self.device.radiant_calselect(quad=None)
@@ -33,53 +30,28 @@ class LAB4DGlitch(radiant_test.RADIANTChannelTest):
 
         self.device.radiant_sig_gen_off()
 
-    def _calculate_voltage_differences(self, wfs, channel):
-        save_data = dict()
-
-        # calculate the voltage differneces ('distribution_widths')
-        n_events = len(wfs)
-        block_size = self.conf["args"]["events_per_block"]
-        n_blocks = int(np.ceil(n_events / block_size))
-        connection_points = np.array([32, 64, 128])
-        channel_ids = np.array([channel])
-
-        connection_jumps = np.zeros((connection_points.shape[0], channel_ids.shape[0], n_blocks, block_size * (2048 // 128 - 1)))
-        connection_jumps[:] = np.nan
-
-        i_block = 0
-
-        for i_event, event in enumerate(wfs):
-            if i_event >= n_events:
-                break
-            j_event = i_event - i_block * block_size
-            if j_event == block_size:
-                i_block += 1
-                j_event = 0
-            for i_channel, channel_id in enumerate(channel_ids):
-                trace = event
-                for i_chunk in range(2048 // 128 - 1):
-                    for i_connection, connection_point in enumerate(connection_points):
-                        connection_jumps[i_connection, i_channel, i_block, j_event * (2048 // 128 - 1) + i_chunk] = (trace[i_chunk * 128 + connection_point - 1] - trace[i_chunk * 128 + connection_point])
+    def _calculate_voltage_differences(self, wfs, channels):
+        """
+        Calculates the voltage differences ('distribution_widths') at the connection points of
+        all `channels` at once. `wfs` has the shape (events, channels, samples), returns the
+        results per channel.
+        """
+        distribution_widths = connection_jump_widths(wfs, self.conf["args"]["events_per_block"])
 
-        distribution_widths = np.zeros((connection_points.shape[0], channel_ids.shape[0], n_blocks))
-        for i_connection in range(connection_points.shape[0]):
-            for i_channel in range(channel_ids.shape[0]):
-                for i_block in range(n_blocks):
-                    distribution_widths[i_connection, i_channel, i_block] = np.sqrt(np.nanmean((connection_jumps[i_connection, i_channel, i_block] - np.nanmean(connection_jumps[i_connection, i_channel, i_block]))**2))
+        results = dict()
+        for i_channel, channel in enumerate(channels):
+            save_data = dict()
+            save_data['voltage_differences_control'] = distribution_widths[0, i_channel].tolist()
+            save_data['voltage_differences_glitch'] = distribution_widths[1, i_channel].tolist()
 
-        save_data['voltage_differences_control'] = list(distribution_widths[0][0])
-        save_data['voltage_differences_glitch'] = list(distribution_widths[1][0])
+            # calculate the difference
+            differences = distribution_widths[1, i_channel] - distribution_widths[0, i_channel]
+            save_data['differences'] = differences.tolist()
+            save_data['points_above_threshold'] = int(np.sum(differences > self.conf['expected_values']['min_difference']))
 
-        # calculate the difference
-        save_data['differences'] = list(np.asarray(save_data['voltage_differences_glitch']) - np.asarray(save_data['voltage_differences_control']))
+            results[channel] = save_data
 
-        values_above_threshold = [d for d in save_data['differences'] if d > self.conf['expected_values']['min_difference']]
-
-        save_data['points_above_threshold'] = len(values_above_threshold)
-
-        # save_data['waveform'] = wfs
-
-        return save_data
+        return results
 
 
     def _compare_voltage_differences(self, data):
@@ -97,13 +69,13 @@ class LAB4DGlitch(radiant_test.RADIANTChannelTest):
 
         waveforms = data["data"]["WAVEFORM"]
         self.logger.info(f"Data taking done")
-        for ich, ch in enumerate(self.conf['args']['channels']):
-            channel_data = [event['radiant_waveforms'][ich] for event in waveforms]
+        channels = self.conf['args']['channels']
+        wfs = np.array([[event['radiant_waveforms'][ch] for ch in channels] for event in waveforms])
+        for ch, data in self._calculate_voltage_differences(wfs, channels).items():
             self.logger.info(f"Check channel {ch}")
-            data = self._calculate_voltage_differences(channel_data, ch)
             self.add_measurement(f"{ch}", data, passed=self._compare_voltage_differences(data))
 
-    def _run_quad(self, quad):
+    def _record_quad(self, quad):
         self.logger.info(f"Start data taking with quad {quad} ...")
 
         data = self.device.daq_record_data(
@@ -111,17 +83,17 @@ class LAB4DGlitch(radiant_test.RADIANTChannelTest):
             force_trigger_interval=self.conf['args']['force_trigger_interval'],
             use_uart=self.conf["args"]["use_uart"])
         self.logger.info(f" ... finished")
+        return data
 
+    def _analyze_quad(self, quad, data):
         waveforms = data["data"]["WAVEFORM"]
-        for ich, ch in enumerate(radiant_test.get_channels_for_quad(quad)):
+        channels = [ch for ch in radiant_test.get_channels_for_quad(quad) if ch in self.conf["args"]["channels"]]
+        if not channels:
+            return
 
-            if ch not in self.conf["args"]["channels"]:
-                continue
-
-            if ch in self.conf["args"]["channels"]:
-                channel_data = [event['radiant_waveforms'][ch] for event in waveforms]
-                data = self._calculate_voltage_differences(channel_data, ch)
-                self.add_measurement(f"{ch}", data, passed=self._compare_voltage_differences(data))
+        wfs = np.array([[event['radiant_waveforms'][ch] for ch in channels] for event in waveforms])
+        for ch, data in self._calculate_voltage_differences(wfs, channels).items():
+            self.add_measurement(f"{ch}", data, passed=self._compare_voltage_differences(data))
 
 
 if __name__ == "__main__":
@@ -3,17 +3,15 @@ import scipy.optimize
 import sys
 import radiant_test
 import matplotlib.pyplot as plt
-from radiant_test.radiant_helper import uid_to_name
-import stationrc.common
-import stationrc.remote_control
-from radiant_test.util import make_serializable, check_param, confirm_or_abort
+from radiant_test.radiant_helper import create_run, uid_to_name
+from radiant_test.util import check_param, confirm_or_abort
 
 class RecordRun(radiant_test.SigGenTest):
     def __init__(self, **kwargs):
         super(RecordRun, self).__init__(**kwargs)
     
     def run_config(self, channel_trigger=0, threshold=0.92, diode_Vbias=1.25, run_length=10, comment="", readout_channel=None):
-        run = stationrc.remote_control.Run(self.device)
+        run = create_run(self.device)
 
         run.run_conf.radiant_load_thresholds_from_file(False)
         run.run_conf.radiant_servo_enable(False)
@@ -102,14 +100,10 @@ class RecordRun(radiant_test.SigGenTest):
             daq_run = self.start_run(run.run_conf, start_up_time=1)
             self.data_dir = self.finish_run(daq_run, delete_src=True)
             self.logger.info(f'Stored run at {self.data_dir}')
-            stationrc.common.rootify(
-                self.data_dir, self.device.station_conf["daq"]["mattak_directory"])
-
-            root_file_channel_trigger = self.data_dir / "combined.root"
+            root_file_channel_trigger = self.rootify(self.data_dir)
             print(f"root file: {root_file_channel_trigger}")
             data["run_file"] = root_file_channel_trigger 
 
-        data = make_serializable(data)
         self.add_measurement(f"{channel}", data, passed=True)
 
 if __name__ == "__main__":
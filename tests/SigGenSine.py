@@ -1,7 +1,7 @@
 import numpy as np
-import scipy.optimize
 
 import radiant_test
+from radiant_test.analysis import fit_sine
 
 
 class SigGenSine(radiant_test.RADIANTChannelTest):
@@ -23,10 +23,8 @@ class SigGenSine(radiant_test.RADIANTChannelTest):
                 frequency=self.conf["args"]["frequency"]
             )
 
-        for quad in self.get_quads():
-            if not self.conf["args"]["external_signal"]:
-                self.device.radiant_calselect(quad=quad)
-            self._run_quad(quad)
+        self.run_quads(self._record_quad, self._analyze_quad,
+                       calselect=not self.conf["args"]["external_signal"])
 
         self.device.radiant_sig_gen_off()
         self.device.radiant_calselect(quad=None)
@@ -53,26 +51,10 @@ class SigGenSine(radiant_test.RADIANTChannelTest):
         return True
 
     def _fit_waveform(self, wvf):
-        def sine(x, amplitude, frequency, phase, offset):
-            return amplitude * np.sin(2 * np.pi * frequency * x + phase) + offset
-
-        def fit_sine(wvf):
-            # Initial guess
-            offset = np.mean(wvf)
-            amplitude = np.max(wvf) - offset
-            frequency = self.conf["args"]["frequency"] * 1e-3  # convert from MHz to GHz
-            phase = 0
-            popt, _ = scipy.optimize.curve_fit(
-                sine,
-                xdata=np.arange(len(wvf)) / (self.result_dict.get("radiant_sample_rate", 3200) / 1000),
-                ydata=wvf,
-                p0=[amplitude, frequency, phase, offset],
-            )
-            avg_residual = np.sum(np.abs(wvf - sine(np.asarray(wvf), *popt))) / len(wvf)
-            return popt, avg_residual
-
         try:
-            popt, avg_residual = fit_sine(wvf)
+            popt, avg_residual = fit_sine(
+                wvf, frequency=self.conf["args"]["frequency"] * 1e-3,  # convert from MHz to GHz
+                sampling_rate=self.result_dict.get("radiant_sample_rate", 3200) / 1000)
         except Exception as e:
             print(e)
             popt = [0, 0, 0, 0]
@@ -100,11 +82,13 @@ class SigGenSine(radiant_test.RADIANTChannelTest):
 
         return data
 
-    def _run_quad(self, quad):
-        data = self.device.daq_record_data(
+    def _record_quad(self, quad):
+        return self.device.daq_record_data(
             num_events=1, force_trigger=True, use_uart=self.conf["args"]["use_uart"],
             read_header=self.conf["args"]["read_header"]
         )
+
+    def _analyze_quad(self, quad, data):
         event = data["data"]["WAVEFORM"][0]
         for ch in radiant_test.get_channels_for_quad(quad):
             if ch not in self.conf["args"]["channels"]:
@@ -1,6 +1,5 @@
 import numpy as np
 import logging
-import matplotlib.pyplot as plt
 import uproot
 import os
 from scipy.optimize import curve_fit
@@ -8,7 +7,9 @@ from scipy.optimize import curve_fit
 import radiant_test
 import stationrc
 import radiant_test.radiant_helper as rh
-from radiant_test.util import make_serializable, check_param
+from radiant_test.analysis import max_sliding_vpp, sliding_vpp
+from radiant_test.concurrency import run_concurrently
+from radiant_test.util import check_param
 import time
 from collections import defaultdict
 
@@ -17,68 +18,28 @@ def lin_func(x, a, b):
     return a * x + b
 
 
-def calc_sliding_vpp(data, window_size=30, start_index=1400, end_index=1900):
-    vpps = []
-    indices = []
-    h = window_size // 2
-    for i in range(start_index, end_index):
-        window = data[i-h:i+h]
-        vpp = np.max(window) - np.min(window)
-        indices.append(i)
-        vpps.append(vpp)
-    return vpps, indices
-
-
 class SignalGen2LAB4D(radiant_test.SigGenTest):
+    outputs = ["amplitude_conversion", "signal_runs"]
+
     def __init__(self, *args, **kwargs):
         super(SignalGen2LAB4D, self).__init__(*args, **kwargs)
 
     def get_vpp(self, wfs, ch, ch_clock, amp, ch_dic, key_str, plot=False):
-        """ Calculate vpp/snr from measured data """
+        """ Calculate vpp/snr from measured data (all events at once) """
 
         n_events = len(wfs)
         self.logger.info(f"Found {n_events} events")
 
-        vpps = []
-        vrms = []
-        snrs = []
-        snr_pure_noise = []
-
-        for i, wf in enumerate(wfs):
-            all_pps, indices = calc_sliding_vpp(wf[ch], start_index=1400, end_index=1900)
-            all_pps_noise, indices_noise = calc_sliding_vpp(wf[ch], start_index=50, end_index=800)
-            max_vpp = np.max(all_pps)
-            max_vpp_noise = np.max(all_pps_noise)
-            vpps.append(float(max_vpp))
-            vrm = np.std(wfs[i, ch, :800])
-            vrms.append(vrm)
-            snrs.append(max_vpp / (2 * vrm))
-            snr_pure_noise.append(max_vpp_noise / (2 * vrm))
-
-            if plot:
-                if i == 5:
-                    fig, ax = plt.subplots()
-
-                    ax.plot(indices_noise, indices_noise, marker='*',
-                            label=f'Vpp: {np.max(indices_noise):.2f} mV')
+        wfs_ch = wfs[:, ch]
+        vpps, _ = max_sliding_vpp(wfs_ch, start_index=1400, end_index=1900)
+        vpps = vpps.astype(float)
+        vpps_noise, _ = max_sliding_vpp(wfs_ch, start_index=50, end_index=800)
+        vrms = np.std(wfs_ch[:, :800], axis=-1)
+        snrs = vpps / (2 * vrms)
+        snr_pure_noise = vpps_noise / (2 * vrms)
 
-                    ax.plot(wf[ch], marker='+',
-                            label=f'Vrms: {vrm:.2f} mV')
-
-                    ax.plot(indices, all_pps, marker='*',
-                            label=f'Vpp: {np.max(all_pps):.2f} mV')
-
-                    ax.set_title(f'input amp @SG {amp:.0f} mVpp')
-
-                    ax.legend()
-                    dir = (f'{str(self.data_dir)}/{rh.uid_to_name(self.result_dict["dut_uid"])}_'
-                           f'{self.name}_{self.result_dict["initialize"]["timestamp"]}')
-
-                    if not os.path.exists(dir):
-                        os.makedirs(dir)
-
-                    fig.savefig(f'{dir}/SignalGen2LAB4D_{amp}_{key_str}_{i}.png')
-                    plt.close('all')
+        if plot and n_events > 5:
+            self.plot_vpp(wfs_ch[5], amp, key_str, 5)
 
         vpp_mean = np.mean(vpps)
         vpp_err = np.std(vpps)
@@ -102,6 +63,39 @@ class SignalGen2LAB4D(radiant_test.SigGenTest):
         ch_dic[key_str]['n_events'] = n_events
         ch_dic[key_str]['run'] = str(self.data_dir)
 
+    def plot_vpp(self, wf, amp, key_str, i):
+        """ Diagnostic plot of the sliding Vpp of one event """
+        import matplotlib.pyplot as plt
+
+        indices = np.arange(1400, 1900)
+        all_pps = sliding_vpp(wf, start_index=1400, end_index=1900)
+        indices_noise = np.arange(50, 800)
+        all_pps_noise = sliding_vpp(wf, start_index=50, end_index=800)
+        vrm = np.std(wf[:800])
+
+        fig, ax = plt.subplots()
+
+        ax.plot(indices_noise, all_pps_noise, marker='*',
+                label=f'Vpp: {np.max(all_pps_noise):.2f} mV')
+
+        ax.plot(wf, marker='+',
+                label=f'Vrms: {vrm:.2f} mV')
+
+        ax.plot(indices, all_pps, marker='*',
+                label=f'Vpp: {np.max(all_pps):.2f} mV')
+
+        ax.set_title(f'input amp @SG {amp:.0f} mVpp')
+
+        ax.legend()
+        dir = (f'{str(self.data_dir)}/{rh.uid_to_name(self.result_dict["dut_uid"])}_'
+               f'{self.name}_{self.result_dict["initialize"]["timestamp"]}')
+
+        if not os.path.exists(dir):
+            os.makedirs(dir)
+
+        fig.savefig(f'{dir}/SignalGen2LAB4D_{amp}_{key_str}_{i}.png')
+        plt.close('all')
+
     def fit_vpp_SG2LAB4D(self, amps_SG, dic):
         amps_SG = np.array(amps_SG)
         snr_mean = np.array([dic[key]["snr_mean"] for key in dic], dtype=float)
@@ -167,6 +161,15 @@ class SignalGen2LAB4D(radiant_test.SigGenTest):
 
         return passed
 
+    def publish_results(self, channel, data):
+        """ Provide the amplitude conversion and the recorded runs of a channel to later tests of the TestSet """
+        if 'fit_parameter' in data:
+            self.publish_artifact('amplitude_conversion', data['fit_parameter'],
+                                  channel=channel, waveform=self.conf['args']['waveform'])
+        if 'raw_data' in data:
+            runs = [{'run': ele['run'], 'amp': ele['amp']} for ele in data['raw_data'].values() if 'run' in ele]
+            self.publish_artifact('signal_runs', runs, channel=channel, test=self.basename)
+
     def run(self):
         super(SignalGen2LAB4D, self).run()
         # turn on the surface amp
@@ -175,9 +178,10 @@ class SignalGen2LAB4D(radiant_test.SigGenTest):
         for i_ch, ch_radiant in enumerate(self.conf["args"]["channels"]):
             logging.info(f"Testing channel {ch_radiant}")
 
+            # The Arduino routes the signal together with the setup of the first amplitude (see below)
+            use_arduino = not self.conf["args"]["channel_setting_manual"]
             sg_ch, sg_ch_clock, ch_radiant_clock = self.get_channel_settings(
-                ch_radiant, use_arduino=~self.conf["args"]["channel_setting_manual"],
-                channel_setting_manual=self.conf["args"]["channel_setting_manual"])
+                ch_radiant, use_arduino=False, channel_setting_manual=self.conf["args"]["channel_setting_manual"])
 
             amps_SG = self.conf['args']['amplitudes']
             ch_dic = {}
@@ -187,10 +191,6 @@ class SignalGen2LAB4D(radiant_test.SigGenTest):
                 ch_dic[key_str] = defaultdict(None)
                 ch_dic[key_str]['amp'] = float(amp_pp)
 
-                self.awg.set_arb_waveform_amplitude_couple(
-                    self.conf['args']['waveform'], sg_ch, sg_ch_clock, amp_pp,
-                    self.conf['args']['clock_amplitude'])
-
                 start_up_time = 15
                 run_length = (self.conf["args"]["number_of_events"] * \
                               (1 / self.conf["args"]["sg_trigger_rate"])) + start_up_time
@@ -199,8 +199,20 @@ class SignalGen2LAB4D(radiant_test.SigGenTest):
                                              readout_channel=ch_radiant, run_length=run_length,
                                              comment="Signal Gen 2 LAB4D Amplitude Test")
 
+                # Program the signal generator (and route the signal) while the station receives the run
+                # configuration. The run is only started once the signal is set up.
                 self.logger.info('Start run ....')
-                daq_run = self.start_run(run.run_conf, start_up_time=start_up_time)
+                steps = {
+                    "awg": lambda: self.awg.set_arb_waveform_amplitude_couple(
+                        self.conf['args']['waveform'], sg_ch, sg_ch_clock, amp_pp,
+                        self.conf['args']['clock_amplitude']),
+                    "station": lambda: self.device.set_run_conf(run.run_conf),
+                }
+                if use_arduino and n == 0:
+                    steps["arduino"] = lambda: self.route_signal(ch_radiant)
+
+                run_concurrently(sequential=not self.conf["args"].get("concurrent_setup", True), **steps)
+                daq_run = self.start_run(None, start_up_time=start_up_time)
 
                 self.logger.info('Send triggers ....')
                 self.awg.send_n_software_triggers(
@@ -222,13 +234,9 @@ class SignalGen2LAB4D(radiant_test.SigGenTest):
                     else:
 
                         if self.conf['args']['rootify']:
-                            stationrc.common.rootify(
-                                self.data_dir, self.device.station_conf["daq"]["mattak_directory"])
-
-                            root_file = self.data_dir / "combined.root"
+                            root_file = self.rootify(self.data_dir)
 
-                            f = uproot.open(root_file)
-                            data = f["combined"]
+                            data = rh.open_combined(root_file)
 
                             # events, channels, samples
                             wfs = np.array(data['waveforms/radiant_data[24][2048]'])
@@ -247,12 +255,10 @@ class SignalGen2LAB4D(radiant_test.SigGenTest):
 
             dic_out = self.fit_vpp_SG2LAB4D(amps_SG, ch_dic)
             passed = self.eval_fit_result(ch_radiant, dic_out)
-            data_buffer = make_serializable(dic_out)
-            self.add_measurement(f"{ch_radiant}", data_buffer, passed=passed)
+            self.add_measurement(f"{ch_radiant}", dic_out, passed=passed)
 
             # This is necessary that some following tests can use the data!
-            # with open(f'{self.device.station_conf["daq"]["data_directory"]}/SignalGen2LAB4D_buffer.json', 'w') as f:
-            #     json.dump(data_buffer, f)
+            self.publish_results(ch_radiant, dic_out)
 
         # turn off the surface amp
         self.device.surface_amps_power_off()
@@ -5,9 +5,9 @@ import time
 
 import radiant_test
 import stationrc
-from radiant_test.util import make_serializable
 
 from collections import defaultdict
+from radiant_test.radiant_helper import open_combined
 
 from tests.SignalGen2LAB4D import SignalGen2LAB4D
 
@@ -18,13 +18,9 @@ class SignalGen2LAB4Dv2(SignalGen2LAB4D):
     def get_sort_waveforms(self, amps_SG):
 
         if self.conf['args']['rootify']:
-            stationrc.common.rootify(
-                self.data_dir, self.device.station_conf["daq"]["mattak_directory"])
+            root_file = self.rootify(self.data_dir)
 
-            root_file = self.data_dir / "combined.root"
-
-            f = uproot.open(root_file)
-            data = f["combined"]
+            data = open_combined(root_file)
 
             # events, channels, samples
             wfs_all_amps = np.array(data['waveforms/radiant_data[24][2048]'])
@@ -103,7 +99,7 @@ class SignalGen2LAB4Dv2(SignalGen2LAB4D):
             logging.info(f"Testing channel {ch_radiant}")
 
             sg_ch, sg_ch_clock, ch_radiant_clock = self.get_channel_settings(
-                ch_radiant, use_arduino=~self.conf["args"]["channel_setting_manual"],
+                ch_radiant, use_arduino=not self.conf["args"]["channel_setting_manual"],
                 channel_setting_manual=self.conf["args"]["channel_setting_manual"])
 
             amps_SG = self.conf['args']['amplitudes']
@@ -161,12 +157,12 @@ class SignalGen2LAB4Dv2(SignalGen2LAB4D):
                     amps_SG, ch_dic)
 
                 passed = self.eval_fit_result(ch_radiant, dic_out)
-                data_buffer = make_serializable(dic_out)
             except FileNotFoundError:  # In case now data is copied.
                 passed = False
-                data_buffer = {}
+                dic_out = {}
 
-            self.add_measurement(f"{ch_radiant}", data_buffer, passed=passed)
+            self.add_measurement(f"{ch_radiant}", dic_out, passed=passed)
+            self.publish_results(ch_radiant, dic_out)
 
 
         # turn off the surface amp
@@ -4,7 +4,6 @@ import uproot
 
 import radiant_test
 import stationrc
-from radiant_test.util import make_serializable
 import time
 from collections import defaultdict
 import glob
@@ -26,7 +25,7 @@ class SignalGen2LAB4Dv3(SignalGen2LAB4Dv2):
             logging.info(f"Testing channel {ch_radiant}")
 
             sg_ch, sg_ch_clock, ch_radiant_clock = self.get_channel_settings(
-                ch_radiant, use_arduino=~self.conf["args"]["channel_setting_manual"],
+                ch_radiant, use_arduino=not self.conf["args"]["channel_setting_manual"],
                 channel_setting_manual=self.conf["args"]["channel_setting_manual"])
 
             amps_SG = self.conf['args']['amplitudes']
@@ -62,8 +61,8 @@ class SignalGen2LAB4Dv3(SignalGen2LAB4Dv2):
                 amps_SG, ch_dic)
 
             passed = self.eval_fit_result(ch_radiant, dic_out)
-            data_buffer = make_serializable(dic_out)
-            self.add_measurement(f"{ch_radiant}", data_buffer, passed=passed)
+            self.add_measurement(f"{ch_radiant}", dic_out, passed=passed)
+            self.publish_results(ch_radiant, dic_out)
 
         # turn off the surface amp
         self.device.surface_amps_power_off()
@@ -1,6 +1,8 @@
 import radiant_test
 import numpy as np
-import scipy
+
+from radiant_test.analysis import window_rms_stats, window_variation
+
 
 class WindowStability(radiant_test.RADIANTChannelTest):
     def __init__(self, *args, **kwargs):
@@ -21,67 +23,42 @@ class WindowStability(radiant_test.RADIANTChannelTest):
             frequency=self.conf["args"]["frequency"]
         )
 
-        for quad in self.get_quads():
-            self.device.radiant_calselect(quad=quad)
-            self._run_quad(quad)
+        self.run_quads(self._record_quad, self._analyze_quad)
 
         self.device.radiant_sig_gen_off()
         self.logger.info("Finish run!")
 
 
-    def _run_quad(self, quad):
-
+    def _record_quad(self, quad):
         self.logger.info(f"Taking data for quad {quad} ...")
         data = self.device.daq_record_data(
             num_events=self.conf["args"]["num_events"], force_trigger=True, read_header=True,
             force_trigger_interval=self.conf['args']['force_trigger_interval'],
             use_uart=self.conf["args"]["use_uart"])
         self.logger.info("... finished")
+        return data
 
-        for ch in radiant_test.get_channels_for_quad(quad):
-            if ch not in self.conf["args"]["channels"]:
-                continue
-
-            waveforms = np.array([ele['radiant_waveforms'][ch] for ele in data["data"]['WAVEFORM']])
-            starting_windows = np.array([ele['radiant_start_windows'][ch] for ele in data["data"]['HEADER']])[:, 0]  # second number is irrelevant
-
-            self.run_per_channel(waveforms, starting_windows, ch)
-
-
-    def run_per_channel(self, waveforms, starting_windows, ch):
-
-        rms_per_window_per_event = self.calculate_per_ch(waveforms, starting_windows, ch)
-
-        self.add_measurement(f"{ch}", rms_per_window_per_event, passed=self._check_data(rms_per_window_per_event))
+    def _analyze_quad(self, quad, data):
+        channels = [ch for ch in radiant_test.get_channels_for_quad(quad) if ch in self.conf["args"]["channels"]]
+        if not channels:
+            return
 
+        # events, channels, samples
+        waveforms = np.array([[ele['radiant_waveforms'][ch] for ch in channels] for ele in data["data"]['WAVEFORM']])
+        # second number is irrelevant
+        starting_windows = np.array([[ele['radiant_start_windows'][ch][0] for ch in channels] for ele in data["data"]['HEADER']])
 
-    def calculate_per_ch(self, waveforms, starting_windows, ch, plot=False):
-        rms_per_window_per_event = {}
+        stats = window_rms_stats(waveforms, starting_windows, upsampling=self.conf["args"]["upsampling"])
 
-        # loop over events
-        for waveform, starting_window in zip(waveforms, starting_windows):
-
-            if self.conf["args"]["upsampling"]:
-                waveform = scipy.signal.resample(waveform, self.conf["args"]["upsampling"] * 2048)
-
-            waveform_windows = np.split(waveform, 16)
-            rms_per_window = np.std(waveform_windows, axis=1)
-
-            idx_windows = (np.arange(16) + starting_window) % 16
-            if starting_window >= 16:
-                idx_windows += 16
-
-            for idx, rms in zip(idx_windows, rms_per_window):
-                if str(idx) not in rms_per_window_per_event:
-                    rms_per_window_per_event[str(idx)] = []
-                rms_per_window_per_event[str(idx)].append(rms)
-
-        return rms_per_window_per_event
+        for i_ch, ch in enumerate(channels):
+            rms_per_window = {
+                "count": stats.count[i_ch].tolist(), "mean": stats.mean[i_ch].tolist(), "std": stats.std[i_ch].tolist()}
+            self.add_measurement(f"{ch}", rms_per_window, passed=self._check_data(rms_per_window))
 
 
     def _check_data(self, rms_per_window_per_event):
 
-        mean_variation, min_power, max_power = calculate_variation(rms_per_window_per_event)
+        mean_variation, min_power, max_power, _, _ = window_variation(rms_per_window_per_event)
 
         passed = ((mean_variation < self.conf["expected_values"]["variation_tolerance"]) and
                   (min_power > self.conf["expected_values"]["min_power"]) and
@@ -90,20 +67,6 @@ class WindowStability(radiant_test.RADIANTChannelTest):
         return passed
 
 
-def calculate_variation(rms_per_window_per_event):
-    rms_variation_per_window = np.zeros(32)
-    rms_mean_per_window = np.zeros(32)
-    for i, ele in rms_per_window_per_event.items():
-        rms_mean_per_window[int(i)] = np.mean(ele)
-        rms_variation_per_window[int(i)] = np.std(ele)
-
-    mean_variation = np.mean(rms_variation_per_window)
-    min_power = np.amin(rms_mean_per_window)
-    max_power = np.amax(rms_mean_per_window)
-
-    return mean_variation, min_power, max_power
-
-
 if __name__ == "__main__":
 
     import argparse
@@ -25,18 +25,16 @@ class uCComms(radiant_test.RADIANTTest):
     def run(self):
         super(uCComms, self).run()
 
-        board_manager_id = stationrc.radiant.register_to_string(
-            self.device.radiant_low_level_interface.read_register("BM_ID")
-        )
+        registers = self.device.radiant_low_level_interface.refresh_registers(["BM_ID", "BM_DATEVERSION"])
+
+        board_manager_id = stationrc.radiant.register_to_string(registers["BM_ID"])
         self.add_measurement(
             "board_manager_id",
             board_manager_id,
             board_manager_id == self.conf["expected_values"]["board_manager_id"],
         )
 
-        board_manager_date_version = stationrc.radiant.DateVersion(
-            self.device.radiant_low_level_interface.read_register("BM_DATEVERSION")
-        ).toDict()
+        board_manager_date_version = stationrc.radiant.DateVersion(registers["BM_DATEVERSION"]).toDict()
         
         self._add_measurements("board_manager_date", board_manager_date_version["date"],
                                self.conf["expected_values"]["board_manager_date"])
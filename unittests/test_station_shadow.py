@@ -0,0 +1,63 @@
+import json
+
+from radiant_test.SigGenTest import SigGenTest
+from radiant_test.SimulatedStation import SimulatedStation
+from radiant_test.station_cache import CachedStation
+from radiant_test.station_shadow import ShadowedStation
+from radiant_test.timing import TimedProxy
+
+
+class RecordSignal(SigGenTest):
+    """ Takes one run with the same run configuration as every SigGenTest """
+
+    def run(self):
+        run = self.initialize_config(0, 0.9, run_length=1)
+        daq_run = self.start_run(run.run_conf, start_up_time=0)
+        self.finish_run(daq_run)
+
+
+def get_station(tmp_path, monkeypatch):
+    # Tests read their configuration from the current working directory
+    monkeypatch.chdir(tmp_path)
+    for directory, name in [("testconfig", "RecordSignal"), ("setconfig", "SiteSet")]:
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / f"{name}.json").write_text(json.dumps({"args": {}}))
+
+    simulated = SimulatedStation(data_directory=tmp_path / "data", run_num_events=1)
+    shadow = ShadowedStation(TimedProxy(simulated, "station"))
+    return simulated, shadow, CachedStation(shadow)
+
+
+def test_set_run_conf_skipped_across_tests(tmp_path, monkeypatch):
+    simulated, shadow, station = get_station(tmp_path, monkeypatch)
+
+    for _ in range(2):
+        RecordSignal(station).run()
+
+    assert simulated.run_number == 2
+    assert shadow.skipped["set_run_conf"] == 1
+
+
+def test_calibration_load_skipped_after_reset(tmp_path, monkeypatch):
+    _, shadow, station = get_station(tmp_path, monkeypatch)
+
+    station.reset_radiant_board()
+    station.radiant_low_level_interface.calibration_load()
+    station.reset_radiant_board()
+
+    assert shadow.skipped["calibration_load"] == 1
+    assert shadow.skipped["reset_radiant_board"] == 0
+
+
+def test_unshadowed_command_forgets_state_when_called(tmp_path, monkeypatch):
+    simulated, shadow, station = get_station(tmp_path, monkeypatch)
+    simulated.radiant_unknown_command = lambda: None
+
+    station.radiant_calselect(None)
+    command = station.radiant_unknown_command
+    station.radiant_calselect(None)
+    assert shadow.skipped["radiant_calselect"] == 1
+
+    command()
+    station.radiant_calselect(None)
+    assert shadow.skipped["radiant_calselect"] == 1